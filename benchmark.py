@@ -0,0 +1,230 @@
+import argparse, json, multiprocessing, os, sys, tempfile, time
+from concurrent.futures import ProcessPoolExecutor
+
+if sys.version_info[0] != 3 or sys.version_info[1] < 11:
+    print("Version Error: Version: %s.%s.%s incompatible please use Python 3.11+" % (sys.version_info[0], sys.version_info[1], sys.version_info[2]))
+    sys.exit(0)
+
+try:
+    import cv2, numpy
+    from kometautils import Failed
+    from modules.cache import Cache
+    from modules.detection import engines, load_regions, _SilentLogger
+    from modules.reset import OverlayReset
+except (ModuleNotFoundError, ImportError) as e:
+    print(e)
+    print("Requirements Error: Requirements are not installed")
+    sys.exit(0)
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+shapes = {"portrait": (1000, 1500), "landscape": (1920, 1080)}
+
+def make_background(rng, size):
+    """ Builds a poster-like image out of a color gradient, blurred shapes and film grain. """
+    width, height = size
+    start, end = rng.integers(0, 256, 3), rng.integers(0, 256, 3)
+    angle = rng.uniform(0, numpy.pi)
+    ys, xs = numpy.mgrid[0:height, 0:width].astype(numpy.float32)
+    ramp = xs * numpy.cos(angle) + ys * numpy.sin(angle)
+    ramp = (ramp - ramp.min()) / max(float(ramp.max() - ramp.min()), 1)
+    image = (start * (1 - ramp[..., None]) + end * ramp[..., None]).astype(numpy.uint8)
+    for _ in range(rng.integers(6, 14)):
+        color = tuple(int(c) for c in rng.integers(0, 256, 3))
+        center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+        if rng.random() < 0.5:
+            axes = (int(rng.integers(width // 20, width // 3)), int(rng.integers(height // 20, height // 3)))
+            cv2.ellipse(image, center, axes, float(rng.uniform(0, 180)), 0, 360, color, -1)
+        else:
+            corner = (int(center[0] + rng.integers(-width // 4, width // 4)), int(center[1] + rng.integers(-height // 4, height // 4)))
+            cv2.rectangle(image, center, corner, color, -1)
+    image = cv2.GaussianBlur(image, (0, 0), 3)
+    grain = rng.normal(0, 6, image.shape)
+    return numpy.clip(image + grain, 0, 255).astype(numpy.uint8)
+
+def place_overlay(rng, size, overlay):
+    """ Picks a spot along the poster's edges, where overlays are placed, with a small offset from the edge. """
+    width, height = size
+    overlay_height, overlay_width = overlay.shape[:2]
+    offset_x, offset_y = int(rng.integers(0, 61)), int(rng.integers(0, 61))
+    x = [offset_x, (width - overlay_width) // 2, width - overlay_width - offset_x][rng.integers(0, 3)]
+    y = [offset_y, (height - overlay_height) // 2, height - overlay_height - offset_y][rng.choice(3, p=[0.45, 0.1, 0.45])]
+    return max(x, 0), max(y, 0)
+
+def overlaps(first, second):
+    return first[0] < second[2] and second[0] < first[2] and first[1] < second[3] and second[1] < first[3]
+
+def composite(image, overlay, x, y):
+    overlay_height, overlay_width = overlay.shape[:2]
+    area = image[y:y + overlay_height, x:x + overlay_width].astype(numpy.float32)
+    if overlay.shape[2] == 4:
+        alpha = overlay[..., 3:4].astype(numpy.float32) / 255
+        area = overlay[..., :3] * alpha + area * (1 - alpha)
+    else:
+        area = overlay[..., :3]
+    image[y:y + overlay_height, x:x + overlay_width] = area.astype(numpy.uint8)
+
+def build_samples(directories, output_dir, count, seed, quality):
+    """ Writes `count` clean and `count` overlaid posters for each shape, each as a PNG and as a recompressed JPEG.
+
+        The overlays pasted into a poster are its ground truth. Overlays never cover each other. """
+    rng = numpy.random.default_rng(seed)
+    overlays = []
+    for directory in directories:
+        for file_name in sorted(os.listdir(directory)):
+            if file_name.lower().endswith(".png"):
+                overlay = cv2.imread(os.path.join(directory, file_name), cv2.IMREAD_UNCHANGED)
+                if overlay is not None and overlay.ndim == 3:
+                    overlays.append((file_name, overlay))
+    if not overlays:
+        raise Failed(f"Images Error: No overlay images found in {', '.join(directories)}")
+    samples = []
+    for shape, size in shapes.items():
+        fits = [(n, o) for n, o in overlays if o.shape[0] <= size[1] and o.shape[1] <= size[0]]
+        for i in range(count * 2):
+            image = make_background(rng, size)
+            applied = []
+            boxes = []
+            if i % 2:
+                for _ in range(rng.integers(1, 3)):
+                    name, overlay = fits[rng.integers(0, len(fits))]
+                    x, y = place_overlay(rng, size, overlay)
+                    box = (x, y, x + overlay.shape[1], y + overlay.shape[0])
+                    if any(overlaps(box, b) for b in boxes):
+                        continue
+                    composite(image, overlay, x, y)
+                    applied.append(name)
+                    boxes.append(box)
+            for encoding, extension, params in [("png", ".png", []), ("jpeg", ".jpg", [cv2.IMWRITE_JPEG_QUALITY, quality])]:
+                path = os.path.join(output_dir, f"{shape}-{i:04d}{extension}")
+                cv2.imwrite(path, image, params)
+                samples.append({"path": path, "shape": shape, "encoding": encoding, "overlays": applied})
+    return samples
+
+def _current_rss():
+    try:
+        with open("/proc/self/status") as handle:
+            for line in handle:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+
+def _peak_rss():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def run_engine(engine_name, directories, regions, threshold, samples, cache_dir):
+    """ Checks every sample with OverlayReset.detect_overlay_in_image, the same way a reset checks a poster, and
+        returns the timings and verdicts. Without `cache_dir` the Detection Cache and Known Overlays are not used. """
+    start_rss = _current_rss()
+    setup_start = time.perf_counter()
+    reset = OverlayReset({"engine": engine_name, "no-cache": cache_dir is None}, _SilentLogger(), base_dir=base_dir)
+    reset.threshold = threshold
+    reset.overlay_directories = directories
+    reset.overlay_regions = regions
+    if cache_dir:
+        reset.cache = Cache(cache_dir)
+    reset.load_detection()
+    # Build every per shape cache up front so the first poster of each shape is not charged for it
+    for size in shapes.values():
+        reset.overlay_engine.detect(numpy.zeros((size[1], size[0]), dtype=numpy.uint8))
+    setup = time.perf_counter() - setup_start
+    results = []
+    for sample in samples:
+        detect_start = time.perf_counter()
+        verdict = reset.detect_overlay_in_image(os.path.basename(sample["path"]), "Benchmark Poster", sample["shape"], img_path=sample["path"])
+        elapsed = time.perf_counter() - detect_start
+        results.append({"seconds": elapsed, "detected": verdict is True, "error": verdict is None})
+    templates = {shape: len(reset.overlay_bank.for_shape((size[1], size[0]))) for shape, size in shapes.items()}
+    peak_rss = _peak_rss()
+    return {"setup": setup, "results": results, "templates": templates, "peak_rss": peak_rss,
+            "rss_growth": peak_rss - start_rss if peak_rss and start_rss else None}
+
+def summarize(engine_name, run, samples, threshold):
+    summary = {"engine": engine_name, "threshold": threshold, "setup_seconds": run["setup"], "peak_rss": run["peak_rss"],
+               "rss_growth": run["rss_growth"], "groups": {}}
+    groups = {}
+    for sample, result in zip(samples, run["results"]):
+        for group in ["all", sample["shape"], sample["encoding"]]:
+            groups.setdefault(group, []).append((sample, result))
+    for group, pairs in groups.items():
+        seconds = sorted(r["seconds"] for _, r in pairs)
+        true_positive = sum(1 for s, r in pairs if s["overlays"] and r["detected"])
+        false_positive = sum(1 for s, r in pairs if not s["overlays"] and r["detected"])
+        false_negative = sum(1 for s, r in pairs if s["overlays"] and not r["detected"])
+        shape_templates = [run["templates"][s["shape"]] for s, _ in pairs]
+        summary["groups"][group] = {
+            "posters": len(pairs),
+            "posters_per_second": len(pairs) / sum(seconds) if sum(seconds) else 0,
+            "p50_seconds": seconds[len(seconds) // 2],
+            "max_seconds": seconds[-1],
+            # Engines stop at the first hit and the fft and pyramid Engines batch or skip templates, so this is the poster
+            # time spread over every template of its shape and not the time one template takes
+            "amortized_template_ms": sum(seconds) * 1000 / sum(shape_templates) if sum(shape_templates) else 0,
+            "precision": true_positive / (true_positive + false_positive) if true_positive + false_positive else 1.0,
+            "recall": true_positive / (true_positive + false_negative) if true_positive + false_negative else 1.0,
+            "false_positives": false_positive,
+            "false_negatives": false_negative,
+            "errors": sum(1 for _, r in pairs if r["error"])
+        }
+    return summary
+
+def print_summary(summary):
+    memory = f"{summary['peak_rss'] / 1024 ** 2:.0f} MB Peak" if summary["peak_rss"] else "Peak Memory Unknown"
+    if summary["rss_growth"]:
+        memory += f" (+{summary['rss_growth'] / 1024 ** 2:.0f} MB)"
+    print(f"\n{summary['engine']} | Setup {summary['setup_seconds']:.2f}s | {memory}")
+    print(f"  {'Group':<10} {'Posters':>7} {'Posters/s':>10} {'p50':>8} {'Max':>8} {'Avg/Tmpl':>8} {'Precision':>10} {'Recall':>7} {'FP':>4} {'FN':>4}")
+    for group, stats in summary["groups"].items():
+        print(f"  {group:<10} {stats['posters']:>7} {stats['posters_per_second']:>10.2f} {stats['p50_seconds']:>7.3f}s {stats['max_seconds']:>7.3f}s "
+              f"{stats['amortized_template_ms']:>6.2f}ms {stats['precision']:>10.3f} {stats['recall']:>7.3f} {stats['false_positives']:>4} {stats['false_negatives']:>4}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the Overlay Detection Engines on synthetic posters without a Plex Server.")
+    parser.add_argument("-en", "--engines", default=",".join(engines), help=f"Comma-separated Engines to benchmark. (Default: {','.join(engines)})")
+    parser.add_argument("-p", "--posters", type=int, default=10, help="Clean and overlaid posters to make for each shape. (Default: 10)")
+    parser.add_argument("-q", "--quality", type=int, default=85, help="JPEG quality of the recompressed posters. (Default: 85)")
+    parser.add_argument("-th", "--threshold", type=float, default=0.95, help="Detection threshold. (Default: 0.95)")
+    parser.add_argument("-sd", "--seed", type=int, default=1, help="Seed for the synthetic posters. (Default: 1)")
+    parser.add_argument("-r", "--regions", default=os.path.join(base_dir, "config", "regions.yml"), help="Overlay Regions file for the pyramid Engine.")
+    parser.add_argument("-nc", "--no-cache", action="store_true", help="Check posters without the Overlay Detection Cache and Known Overlays for raw Engine numbers.")
+    parser.add_argument("-j", "--json", default=None, help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    selected = [e.strip().lower() for e in args.engines.split(",") if e.strip()]
+    for engine_name in selected:
+        if engine_name not in engines:
+            raise Failed(f"Option Error: Engine: {engine_name} is invalid. Options: {', '.join(engines)}")
+    directories = [os.path.join(base_dir, "overlays")]
+    if os.path.exists(os.path.join(base_dir, "config", "overlays")):
+        directories.append(os.path.join(base_dir, "config", "overlays"))
+    regions = load_regions(args.regions) if os.path.exists(args.regions) else None
+
+    summaries = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        build_start = time.perf_counter()
+        samples = build_samples(directories, output_dir, args.posters, args.seed, args.quality)
+        print(f"{len(samples)} Synthetic Posters Made in {time.perf_counter() - build_start:.1f}s")
+        for engine_name in selected:
+            # Every engine gets a fresh process so its memory use is not mixed up with the other engines
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                # Every engine starts from an empty cache so earlier engines' verdicts and known overlays are not reused
+                cache_dir = None if args.no_cache else tempfile.mkdtemp(dir=output_dir)
+                run = executor.submit(run_engine, engine_name, directories, regions, args.threshold, samples, cache_dir).result()
+            summaries.append(summarize(engine_name, run, samples, args.threshold))
+            print_summary(summaries[-1])
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as handle:
+            json.dump(summaries, handle, indent=2)
+        print(f"\nResults Saved: {args.json}")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Failed as e:
+        print(e)
+        sys.exit(1)
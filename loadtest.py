@@ -0,0 +1,117 @@
+import argparse, json, os, shutil, subprocess, sys, tempfile, time
+
+if sys.version_info[0] != 3 or sys.version_info[1] < 11:
+    print("Version Error: Version: %s.%s.%s incompatible please use Python 3.11+" % (sys.version_info[0], sys.version_info[1], sys.version_info[2]))
+    sys.exit(0)
+
+try:
+    from kometautils import Failed
+    from tools.stand_in import StandInLibrary, StandInServer
+except (ModuleNotFoundError, ImportError) as e:
+    print(e)
+    print("Requirements Error: Requirements are not installed")
+    sys.exit(0)
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Points tmdbapis at the Stand-In before running the script the same way Python would
+bootstrap = "import runpy, sys, tmdbapis.api3; tmdbapis.api3.base_url = sys.argv[1]; sys.argv = sys.argv[2:]; runpy.run_path(sys.argv[0], run_name='__main__')"
+
+def copy_script(run_dir):
+    """ Copies the script into `run_dir` so the runs get their own config folder, cache, resume journal and logs. """
+    shutil.copy(os.path.join(base_dir, "overlay_reset.py"), run_dir)
+    shutil.copytree(os.path.join(base_dir, "modules"), os.path.join(run_dir, "modules"), ignore=shutil.ignore_patterns("__pycache__"))
+    shutil.copytree(os.path.join(base_dir, "overlays"), os.path.join(run_dir, "overlays"))
+    os.makedirs(os.path.join(run_dir, "config"))
+    if os.path.exists(os.path.join(base_dir, "VERSION")):
+        shutil.copy(os.path.join(base_dir, "VERSION"), run_dir)
+    if os.path.exists(os.path.join(base_dir, "config", "regions.yml")):
+        shutil.copy(os.path.join(base_dir, "config", "regions.yml"), os.path.join(run_dir, "config"))
+
+def run_script(run_dir, server, library, script_args, quiet):
+    command = [sys.executable, "-c", bootstrap, server.tmdb_url, os.path.join(run_dir, "overlay_reset.py"),
+               "-u", server.url, "-t", "stand-in", "-l", library, "-ta", "stand-in"] + script_args
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=run_dir, stdout=subprocess.DEVNULL if quiet else None, stderr=subprocess.STDOUT if quiet else None)
+    return time.perf_counter() - start, result.returncode
+
+def summarize(run, seconds, returncode, stats):
+    calls = sum(stats["calls"].values())
+    plex_calls = sum(v for k, v in stats["calls"].items() if " Plex " in k)
+    items = stats["items"]
+    return {
+        "run": run, "seconds": seconds, "returncode": returncode, "items": items,
+        "items_per_second": items / seconds if seconds else 0,
+        "uploads": stats["uploads"], "posters_per_second": stats["uploads"] / seconds if seconds else 0,
+        "label_edits": stats["label_edits"], "calls": calls, "plex_calls": plex_calls, "tmdb_calls": calls - plex_calls,
+        "calls_per_item": calls / items if items else 0, "endpoints": stats["calls"]
+    }
+
+def print_summary(summary, endpoints):
+    print(f"\nRun {summary['run']} | {summary['seconds']:.2f}s | Exit Code {summary['returncode']}")
+    print(f"  Items: {summary['items']} ({summary['items_per_second']:.2f}/s) | Uploads: {summary['uploads']} ({summary['posters_per_second']:.2f}/s) | "
+          f"Label Edits: {summary['label_edits']}")
+    print(f"  HTTP Calls: {summary['calls']} (Plex: {summary['plex_calls']}, TMDb: {summary['tmdb_calls']}) | Calls per Item: {summary['calls_per_item']:.2f}")
+    if endpoints:
+        for endpoint, count in sorted(summary["endpoints"].items(), key=lambda e: -e[1]):
+            print(f"    {count:>7} {endpoint}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load tests Overlay Reset against a local stand-in Plex Server and TMDb API.",
+                                     epilog="Arguments after -- are passed through to overlay_reset.py, i.e. -- -w 4 -s -e -ai")
+    parser.add_argument("-m", "--movies", type=int, default=200, help="Movies in the Movies library. (Default: 200)")
+    parser.add_argument("-sh", "--shows", type=int, default=20, help="Shows in the TV Shows library. (Default: 20)")
+    parser.add_argument("-sn", "--seasons", type=int, default=2, help="Seasons in each Show. (Default: 2)")
+    parser.add_argument("-ep", "--episodes", type=int, default=5, help="Episodes in each Season. (Default: 5)")
+    parser.add_argument("-lt", "--library-type", choices=["movie", "show"], default="movie", help="Library to run against. (Default: movie)")
+    parser.add_argument("-la", "--latency", type=float, default=0, help="Seconds every request waits before it is answered. (Default: 0)")
+    parser.add_argument("-er", "--error-rate", type=float, default=0, help="Share of requests that fail with a 500. (Default: 0)")
+    parser.add_argument("-ue", "--upload-error-rate", type=float, default=0, help="Share of poster uploads that fail with a 400. (Default: 0)")
+    parser.add_argument("-r", "--runs", type=int, default=1, help="Times to run the script, later runs reuse the cache of the earlier ones. (Default: 1)")
+    parser.add_argument("-sd", "--seed", type=int, default=1, help="Seed for the synthetic library. (Default: 1)")
+    parser.add_argument("-sv", "--serve", action="store_true", help="Only run the Stand-In and print its URLs until stopped.")
+    parser.add_argument("-bd", "--breakdown", action="store_true", help="List the HTTP calls made to each endpoint.")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Hide the script's output.")
+    parser.add_argument("-j", "--json", default=None, help="Write the results to this JSON file.")
+    argv = sys.argv[1:]
+    script_args = argv[argv.index("--") + 1:] if "--" in argv else []
+    args = parser.parse_args(argv[:argv.index("--")] if "--" in argv else argv)
+
+    for rate in [args.error_rate, args.upload_error_rate]:
+        if not 0 <= rate <= 1:
+            raise Failed(f"Option Error: Error Rate: {rate} must be between 0 and 1")
+    build_start = time.perf_counter()
+    library = StandInLibrary(os.path.join(base_dir, "overlays", "4K.png"), movies=args.movies, shows=args.shows,
+                             seasons=args.seasons, episodes=args.episodes, seed=args.seed)
+    server = StandInServer(library, latency=args.latency, error_rate=args.error_rate, upload_error_rate=args.upload_error_rate, seed=args.seed).start()
+    print(f"Stand-In Library of {len(library.items)} Items Made in {time.perf_counter() - build_start:.1f}s")
+
+    try:
+        if args.serve:
+            print(f"Plex URL: {server.url}\nTMDb URL: {server.tmdb_url} (set tmdbapis.api3.base_url to use it)")
+            while True:
+                time.sleep(60)
+        summaries = []
+        section = "Movies" if args.library_type == "movie" else "TV Shows"
+        with tempfile.TemporaryDirectory() as run_dir:
+            copy_script(run_dir)
+            for run in range(1, args.runs + 1):
+                library.reset_stats()
+                seconds, returncode = run_script(run_dir, server, section, script_args, args.quiet)
+                summaries.append(summarize(run, seconds, returncode, library.stats()))
+                print_summary(summaries[-1], args.breakdown)
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as handle:
+                json.dump(summaries, handle, indent=2)
+            print(f"\nResults Saved: {args.json}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Failed as e:
+        print(e)
+        sys.exit(1)
@@ -0,0 +1,78 @@
+import os, time
+
+from kometautils import util
+
+class AssetIndex:
+    """ Lists the asset folder once and answers every asset folder and asset file lookup from memory.
+
+        Folders are indexed down to the same depth the nested asset search globbed. When a cache is given the listings
+        are persisted and a folder is only listed again when its modification time has changed. """
+
+    def __init__(self, asset_dir, cache=None, depth=5):
+        self.asset_dir = asset_dir
+        self.cache = cache
+        self.depth = depth
+        self.directories = {}
+        self.files = {}
+        self.listed = 0
+        self.reused = 0
+        self._listings = {}
+
+    def __len__(self):
+        return len(self._listings)
+
+    def scan(self):
+        self.directories = {}
+        self.files = {}
+        self.listed = 0
+        self.reused = 0
+        known = self.cache.query_asset_listings(self.asset_dir) if self.cache else {}
+        self._listings = {}
+        self._scan(self.asset_dir, 0, known)
+        for paths in self.directories.values():
+            paths.sort(key=lambda p: (p.count(os.sep), p))
+        if self.cache:
+            self.cache.update_asset_listings(self.asset_dir, self._listings)
+
+    def _scan(self, path, depth, known):
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return
+        checked = time.time_ns()
+        listing = known.get(path)
+        # Directory times can be coarse on network shares so a listing taken right after a change is listed again
+        if listing and listing[0] == mtime and listing[1] - mtime > 2 * 10 ** 9:
+            entries = listing[2]
+            checked = listing[1]
+            self.reused += 1
+        else:
+            try:
+                entries = sorted((e.name, e.is_dir()) for e in os.scandir(path))
+            except OSError:
+                return
+            self.listed += 1
+        self._listings[path] = (mtime, checked, entries)
+        directory = os.path.normcase(path)
+        for name, is_dir in entries:
+            if name.startswith("."):
+                continue
+            if is_dir:
+                if depth < self.depth:
+                    child = os.path.join(path, name)
+                    self.directories.setdefault(os.path.normcase(name), []).append(child)
+                    self._scan(child, depth + 1, known)
+                continue
+            for i, character in enumerate(name):
+                if character == ".":
+                    self.files.setdefault((directory, os.path.normcase(name[:i])), os.path.join(path, name))
+
+    def find_directory(self, name):
+        paths = self.directories.get(os.path.normcase(name))
+        return paths[0] if paths else None
+
+    def find_file(self, directory, name):
+        if directory not in self._listings:
+            matches = util.glob_filter(os.path.join(directory, f"{name}.*"))
+            return matches[0] if matches else None
+        return self.files.get((os.path.normcase(directory), os.path.normcase(name)))
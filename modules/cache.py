@@ -0,0 +1,161 @@
+import json, os, sqlite3, time
+from contextlib import closing
+
+class Cache:
+    def __init__(self, config_dir, max_verdicts=250000, max_fingerprints=100000, max_uploads=250000):
+        self.cache_path = os.path.join(config_dir, "overlay_reset.cache")
+        self.max_verdicts = max_verdicts
+        self.max_fingerprints = max_fingerprints
+        self.max_uploads = max_uploads
+        self.hits = 0
+        self.misses = 0
+        with sqlite3.connect(self.cache_path) as connection:
+            with closing(connection.cursor()) as cursor:
+                cursor.execute(
+                    """CREATE TABLE IF NOT EXISTS verdicts (
+                    key TEXT PRIMARY KEY,
+                    fingerprint TEXT,
+                    verdict INTEGER,
+                    score REAL,
+                    last_used INTEGER)"""
+                )
+                cursor.execute("CREATE INDEX IF NOT EXISTS verdicts_last_used ON verdicts (last_used)")
+                cursor.execute(
+                    """CREATE TABLE IF NOT EXISTS asset_listings (
+                    path TEXT PRIMARY KEY,
+                    root TEXT,
+                    mtime INTEGER,
+                    checked INTEGER,
+                    entries TEXT)"""
+                )
+                cursor.execute("CREATE INDEX IF NOT EXISTS asset_listings_root ON asset_listings (root)")
+                cursor.execute(
+                    """CREATE TABLE IF NOT EXISTS tmdb (
+                    key TEXT PRIMARY KEY,
+                    data TEXT,
+                    expires INTEGER)"""
+                )
+                cursor.execute(
+                    """CREATE TABLE IF NOT EXISTS fingerprints (
+                    hash TEXT,
+                    size TEXT,
+                    template TEXT,
+                    x INTEGER,
+                    y INTEGER,
+                    templates TEXT,
+                    added INTEGER,
+                    PRIMARY KEY (hash, template))"""
+                )
+                cursor.execute(
+                    """CREATE TABLE IF NOT EXISTS uploads (
+                    rating_key TEXT PRIMARY KEY,
+                    source TEXT,
+                    uploaded INTEGER)"""
+                )
+
+    def query_verdict(self, key, fingerprint):
+        with sqlite3.connect(self.cache_path) as connection:
+            connection.row_factory = sqlite3.Row
+            with closing(connection.cursor()) as cursor:
+                cursor.execute("SELECT * FROM verdicts WHERE key = ? AND fingerprint = ?", (key, fingerprint))
+                row = cursor.fetchone()
+                if row:
+                    cursor.execute("UPDATE verdicts SET last_used = ? WHERE key = ?", (int(time.time()), key))
+                    self.hits += 1
+                    return True, None if row["verdict"] is None else row["verdict"] == 1, row["score"]
+        self.misses += 1
+        return False, None, None
+
+    def update_verdict(self, key, fingerprint, verdict, score=None):
+        with sqlite3.connect(self.cache_path) as connection:
+            with closing(connection.cursor()) as cursor:
+                cursor.execute(
+                    "INSERT OR REPLACE INTO verdicts (key, fingerprint, verdict, score, last_used) VALUES (?, ?, ?, ?, ?)",
+                    (key, fingerprint, None if verdict is None else int(verdict), score, int(time.time()))
+                )
+
+    def query_asset_listings(self, root):
+        with sqlite3.connect(self.cache_path) as connection:
+            connection.row_factory = sqlite3.Row
+            with closing(connection.cursor()) as cursor:
+                cursor.execute("SELECT * FROM asset_listings WHERE root = ?", (root,))
+                return {row["path"]: (row["mtime"], row["checked"], [tuple(e) for e in json.loads(row["entries"])]) for row in cursor.fetchall()}
+
+    def update_asset_listings(self, root, listings):
+        with sqlite3.connect(self.cache_path) as connection:
+            with closing(connection.cursor()) as cursor:
+                cursor.execute("DELETE FROM asset_listings WHERE root = ?", (root,))
+                cursor.executemany(
+                    "INSERT OR REPLACE INTO asset_listings (path, root, mtime, checked, entries) VALUES (?, ?, ?, ?, ?)",
+                    [(path, root, mtime, checked, json.dumps(entries)) for path, (mtime, checked, entries) in listings.items()]
+                )
+
+    def query_tmdb(self, key):
+        with sqlite3.connect(self.cache_path) as connection:
+            connection.row_factory = sqlite3.Row
+            with closing(connection.cursor()) as cursor:
+                cursor.execute("SELECT * FROM tmdb WHERE key = ? AND expires > ?", (key, int(time.time())))
+                row = cursor.fetchone()
+                if row:
+                    return True, json.loads(row["data"])
+        return False, None
+
+    def update_tmdb(self, key, data, expiration):
+        with sqlite3.connect(self.cache_path) as connection:
+            with closing(connection.cursor()) as cursor:
+                cursor.execute(
+                    "INSERT OR REPLACE INTO tmdb (key, data, expires) VALUES (?, ?, ?)",
+                    (key, json.dumps(data), int(time.time() + expiration * 86400))
+                )
+
+    def query_fingerprints(self, templates):
+        """ Returns the fingerprints saved with the given template fingerprint, dropping the ones saved with any other. """
+        with sqlite3.connect(self.cache_path) as connection:
+            connection.row_factory = sqlite3.Row
+            with closing(connection.cursor()) as cursor:
+                cursor.execute("DELETE FROM fingerprints WHERE templates != ?", (templates,))
+                cursor.execute("SELECT * FROM fingerprints")
+                return [(row["hash"], row["size"], row["template"], row["x"], row["y"]) for row in cursor.fetchall()]
+
+    def update_fingerprint(self, templates, image_hash, size, template, x, y):
+        with sqlite3.connect(self.cache_path) as connection:
+            with closing(connection.cursor()) as cursor:
+                cursor.execute(
+                    "INSERT OR REPLACE INTO fingerprints (hash, size, template, x, y, templates, added) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (image_hash, size, template, x, y, templates, int(time.time()))
+                )
+
+    def query_upload(self, rating_key):
+        """ Returns the source of the last poster uploaded to the Item or `None`. """
+        with sqlite3.connect(self.cache_path) as connection:
+            connection.row_factory = sqlite3.Row
+            with closing(connection.cursor()) as cursor:
+                cursor.execute("SELECT * FROM uploads WHERE rating_key = ?", (str(rating_key),))
+                row = cursor.fetchone()
+                return row["source"] if row else None
+
+    def update_upload(self, rating_key, source):
+        with sqlite3.connect(self.cache_path) as connection:
+            with closing(connection.cursor()) as cursor:
+                cursor.execute(
+                    "INSERT OR REPLACE INTO uploads (rating_key, source, uploaded) VALUES (?, ?, ?)",
+                    (str(rating_key), source, int(time.time()))
+                )
+
+    def evict(self):
+        with sqlite3.connect(self.cache_path) as connection:
+            with closing(connection.cursor()) as cursor:
+                cursor.execute("SELECT count(*) FROM verdicts")
+                extra = cursor.fetchone()[0] - self.max_verdicts
+                if extra > 0:
+                    cursor.execute("DELETE FROM verdicts WHERE key IN (SELECT key FROM verdicts ORDER BY last_used LIMIT ?)", (extra,))
+                cursor.execute("DELETE FROM tmdb WHERE expires <= ?", (int(time.time()),))
+                cursor.execute("SELECT count(*) FROM fingerprints")
+                extra_fingerprints = cursor.fetchone()[0] - self.max_fingerprints
+                if extra_fingerprints > 0:
+                    cursor.execute("DELETE FROM fingerprints WHERE rowid IN (SELECT rowid FROM fingerprints ORDER BY added LIMIT ?)", (extra_fingerprints,))
+                cursor.execute("SELECT count(*) FROM uploads")
+                extra_uploads = cursor.fetchone()[0] - self.max_uploads
+                if extra_uploads > 0:
+                    cursor.execute("DELETE FROM uploads WHERE rating_key IN (SELECT rating_key FROM uploads ORDER BY uploaded LIMIT ?)", (extra_uploads,))
+                return max(extra, 0)
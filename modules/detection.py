@@ -0,0 +1,272 @@
+import cv2, fnmatch, math, multiprocessing, numpy, os, signal
+from concurrent.futures import ProcessPoolExecutor
+from modules.regions import default_regions, engines, load_regions # noqa
+from modules.templates import TemplateBank
+
+# The most memory all of the FFT Engine's cached template spectra can take, split between the processes of a Detection Pool
+fft_cache_bytes = 512 * 1024 ** 2
+
+class MatchEngine:
+    name = "match"
+
+    def __init__(self, bank, threshold=0.95):
+        self.bank = bank
+        self.threshold = threshold
+
+    def scores(self, target):
+        return [(t, float(cv2.matchTemplate(target, t.image, cv2.TM_CCOEFF_NORMED).max())) for t in self.bank.for_shape(target.shape)]
+
+    def detect(self, target):
+        """ Returns the first Template found with its score and the top left corner it was found at, otherwise
+            `None`, the best score and `None`. Every Engine's `detect` returns the same. """
+        best = None
+        for template in self.bank.for_shape(target.shape):
+            _, score, _, location = cv2.minMaxLoc(cv2.matchTemplate(target, template.image, cv2.TM_CCOEFF_NORMED))
+            if score < self.threshold:
+                best = score if best is None else max(best, score)
+                continue
+            self.bank.hit(template)
+            return template, score, location
+        return None, best, None
+
+class FFTEngine:
+    """ Correlates the target against every template spectrum by transforming the target a single time.
+
+        Scores are computed in single precision so any template within `margin` of the threshold is confirmed with
+        cv2.matchTemplate around its candidate locations before it counts as a detection. """
+    name = "fft"
+
+    def __init__(self, bank, threshold=0.95, batch_size=8, margin=0.02, cache_bytes=fft_cache_bytes):
+        self.bank = bank
+        self.threshold = threshold
+        self.batch_size = batch_size
+        self.margin = margin
+        self.cache_bytes = cache_bytes
+        self._spectra = {}
+        self._cached_bytes = 0
+        self._version = None
+
+    def _spectrum(self, template, shape):
+        if self._version != self.bank.version:
+            self._spectra = {}
+            self._cached_bytes = 0
+            self._version = self.bank.version
+        key = (template.path, shape)
+        if key in self._spectra:
+            return self._spectra[key]
+        image = numpy.zeros(shape, dtype=numpy.float32)
+        h, w = template.shape[:2]
+        image[:h, :w] = template.image
+        image[:h, :w] -= image[:h, :w].mean()
+        spectrum = cv2.dft(image)
+        norm = float(numpy.sqrt(numpy.square(image[:h, :w], dtype=numpy.float64).sum()))
+        if self._cached_bytes + spectrum.nbytes <= self.cache_bytes:
+            self._spectra[key] = (spectrum, norm)
+            self._cached_bytes += spectrum.nbytes
+        return spectrum, norm
+
+    @staticmethod
+    def _inverse_deviation(centered, h, w):
+        rows, cols = centered.shape[0] - h + 1, centered.shape[1] - w + 1
+        mean = cv2.boxFilter(centered, cv2.CV_32F, (w, h), anchor=(0, 0), borderType=cv2.BORDER_CONSTANT)[:rows, :cols]
+        square = cv2.sqrBoxFilter(centered, cv2.CV_32F, (w, h), anchor=(0, 0), borderType=cv2.BORDER_CONSTANT)[:rows, :cols]
+        variance = cv2.max(cv2.subtract(square, cv2.multiply(mean, mean)), 0.25)
+        return cv2.pow(variance, -0.5) / numpy.float32(numpy.sqrt(h * w))
+
+    def _batches(self, target):
+        shape = target.shape[:2]
+        target_spectrum = cv2.dft(target.astype(numpy.float32))
+        centered = target.astype(numpy.float32) - numpy.float32(target.mean())
+        window_stats = {}
+        templates = self.bank.for_shape(shape)
+        for b in range(0, len(templates), self.batch_size):
+            batch = templates[b:b + self.batch_size]
+            spectra = [self._spectrum(t, shape) for t in batch]
+            correlations = [cv2.idft(cv2.mulSpectrums(target_spectrum, spectrum, 0, conjB=True), flags=cv2.DFT_REAL_OUTPUT | cv2.DFT_SCALE) for spectrum, _ in spectra]
+            results = []
+            for template, (_, norm), correlation in zip(batch, spectra, correlations):
+                h, w = template.shape[:2]
+                if norm == 0:
+                    _, score, _, location = cv2.minMaxLoc(cv2.matchTemplate(target, template.image, cv2.TM_CCOEFF_NORMED))
+                    results.append((template, score, location))
+                    continue
+                if (h, w) not in window_stats:
+                    window_stats[(h, w)] = self._inverse_deviation(centered, h, w)
+                score_map = correlation[:shape[0] - h + 1, :shape[1] - w + 1] * window_stats[(h, w)]
+                results.append((template, *self._confirm(target, template, score_map, norm)))
+            yield results
+
+    def _confirm(self, target, template, score_map, norm):
+        score = float(score_map.max()) / norm
+        if score < self.threshold - self.margin:
+            return score, None
+        ys, xs = numpy.where(score_map >= (self.threshold - self.margin) * norm)
+        h, w = template.shape[:2]
+        roi = target[ys.min():ys.max() + h, xs.min():xs.max() + w]
+        _, score, _, (x, y) = cv2.minMaxLoc(cv2.matchTemplate(roi, template.image, cv2.TM_CCOEFF_NORMED))
+        return score, (int(xs.min()) + x, int(ys.min()) + y)
+
+    def scores(self, target):
+        return [(template, score) for results in self._batches(target) for template, score, _ in results]
+
+    def detect(self, target):
+        best = None
+        for results in self._batches(target):
+            for template, score, location in results:
+                if score >= self.threshold:
+                    self.bank.hit(template)
+                    return template, score, location
+                best = score if best is None else max(best, score)
+        return None, best, None
+
+class PyramidEngine:
+    """ Matches downscaled templates against a downscaled poster inside each template's placement regions and only
+        runs full resolution matching around the coarse candidates. """
+    name = "pyramid"
+
+    def __init__(self, bank, threshold=0.95, regions=None, levels=1, margin=0.15, min_size=8):
+        self.bank = bank
+        self.threshold = threshold
+        self.regions = regions if regions else default_regions
+        self.levels = levels
+        self.margin = margin
+        self.min_size = min_size
+        self._coarse = {}
+        self._version = None
+
+    def _coarse_template(self, template):
+        if self._version != self.bank.version:
+            self._coarse = {}
+            self._version = self.bank.version
+        if template.path not in self._coarse:
+            image = template.image
+            for _ in range(self.levels):
+                image = cv2.pyrDown(image)
+            self._coarse[template.path] = image if min(image.shape[:2]) >= self.min_size else None
+        return self._coarse[template.path]
+
+    def _regions(self, template, shape):
+        height, width = shape[:2]
+        h, w = template.shape[:2]
+        placements = self.regions.get("portrait" if height >= width else "landscape", {})
+        boxes = next((b for p, b in placements.items() if fnmatch.fnmatch(template.name, p)), [[0, 0, 1, 1]])
+        for left, top, right, bottom in boxes:
+            x0, y0 = int(left * width), int(top * height)
+            x1, y1 = min(math.ceil(right * width), width), min(math.ceil(bottom * height), height)
+            x0, y0 = max(min(x0, x1 - w), 0), max(min(y0, y1 - h), 0)
+            yield x0, y0, max(x1, x0 + w), max(y1, y0 + h)
+
+    def _score(self, target, coarse_target, template):
+        """ Returns the template's best score and, when it was matched at full size, where it was found. """
+        factor = 2 ** self.levels
+        h, w = template.shape[:2]
+        coarse = self._coarse_template(template)
+        best = None
+        best_location = None
+        for x0, y0, x1, y1 in self._regions(template, target.shape):
+            if coarse is None:
+                _, score, _, (x, y) = cv2.minMaxLoc(cv2.matchTemplate(target[y0:y1, x0:x1], template.image, cv2.TM_CCOEFF_NORMED))
+                if best is None or score > best:
+                    best, best_location = score, (x0 + x, y0 + y)
+                continue
+            cx0, cy0, cx1, cy1 = x0 // factor, y0 // factor, min(-(-x1 // factor), coarse_target.shape[1]), min(-(-y1 // factor), coarse_target.shape[0])
+            if cy1 - cy0 < coarse.shape[0] or cx1 - cx0 < coarse.shape[1]:
+                continue
+            coarse_result = cv2.matchTemplate(coarse_target[cy0:cy1, cx0:cx1], coarse, cv2.TM_CCOEFF_NORMED)
+            score = float(coarse_result.max())
+            location = None
+            if score >= self.threshold - self.margin:
+                ys, xs = numpy.where(coarse_result >= self.threshold - self.margin)
+                fy0, fx0 = max((cy0 + ys.min() - 1) * factor, 0), max((cx0 + xs.min() - 1) * factor, 0)
+                fy1, fx1 = min((cy0 + ys.max() + 1) * factor + h, target.shape[0]), min((cx0 + xs.max() + 1) * factor + w, target.shape[1])
+                _, score, _, (x, y) = cv2.minMaxLoc(cv2.matchTemplate(target[fy0:fy1, fx0:fx1], template.image, cv2.TM_CCOEFF_NORMED))
+                location = (int(fx0) + x, int(fy0) + y)
+            if best is None or score > best:
+                best, best_location = score, location
+            if best >= self.threshold:
+                break
+        return best, best_location
+
+    def _pyramid(self, target):
+        coarse_target = target
+        for _ in range(self.levels):
+            coarse_target = cv2.pyrDown(coarse_target)
+        return coarse_target
+
+    def scores(self, target):
+        coarse_target = self._pyramid(target)
+        return [(t, self._score(target, coarse_target, t)[0]) for t in self.bank.for_shape(target.shape)]
+
+    def detect(self, target):
+        coarse_target = self._pyramid(target)
+        best = None
+        for template in self.bank.for_shape(target.shape):
+            score, location = self._score(target, coarse_target, template)
+            if score is None:
+                continue
+            if score >= self.threshold:
+                self.bank.hit(template)
+                return template, score, location
+            best = score if best is None else max(best, score)
+        return None, best, None
+
+def get_engine(name, bank, threshold=0.95, regions=None, cache_bytes=fft_cache_bytes):
+    if name == "fft":
+        return FFTEngine(bank, threshold=threshold, cache_bytes=cache_bytes)
+    elif name == "pyramid":
+        return PyramidEngine(bank, threshold=threshold, regions=regions)
+    return MatchEngine(bank, threshold=threshold)
+
+class _SilentLogger:
+    def __getattr__(self, attr):
+        return lambda *args, **kwargs: None
+
+_worker_engine = None
+_worker_version = None
+
+def _start_worker(directories, engine_name, threshold, regions, cache_bytes, version):
+    global _worker_engine, _worker_version
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_engine = get_engine(engine_name, TemplateBank(directories, _SilentLogger()), threshold=threshold, regions=regions, cache_bytes=cache_bytes)
+    _worker_version = version
+
+def _detect(target, version):
+    global _worker_version
+    # The templates are only reloaded when the main process has reloaded its own
+    if version != _worker_version:
+        _worker_engine.bank.refresh()
+        _worker_version = version
+    template, score, location = _worker_engine.detect(target)
+    return template.path if template else None, score, location
+
+class DetectionPool:
+    """ Runs the detection engine in worker processes so matching from many worker threads is not limited to one core.
+
+        Only available where processes can be forked. The processes are started straight away so they are forked
+        before any worker threads exist. The FFT Engine's spectra cache is split between the processes so the pool
+        caches no more spectra than a single engine would. """
+
+    def __init__(self, bank, engine_name, threshold=0.95, regions=None, processes=None):
+        self.bank = bank
+        self.name = engine_name
+        self.threshold = threshold
+        self.processes = processes if processes else os.cpu_count()
+        self.executor = ProcessPoolExecutor(max_workers=self.processes, mp_context=multiprocessing.get_context("fork"),
+                                            initializer=_start_worker, initargs=(bank.directories, engine_name, threshold, regions, fft_cache_bytes // self.processes, bank.version))
+        self.executor.submit(int).result()
+
+    @staticmethod
+    def available():
+        return "fork" in multiprocessing.get_all_start_methods()
+
+    def detect(self, target):
+        path, score, location = self.executor.submit(_detect, target, self.bank.version).result()
+        if path is None:
+            return None, score, None
+        template = self.bank.templates.get(path)
+        if template:
+            self.bank.hit(template)
+        return template if template else path, score, location
+
+    def shutdown(self):
+        self.executor.shutdown(cancel_futures=True)
@@ -0,0 +1,81 @@
+import threading
+
+import cv2, numpy
+
+def dhash(gray, size=16):
+    """ Returns the difference hash of a grayscale image as an int of `size` * `size` bits, one for whether each cell
+        of the shrunk image is brighter than the cell to its left. """
+    small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA).astype(numpy.int16)
+    return int.from_bytes(numpy.packbits(small[:, 1:] > small[:, :-1]).tobytes(), "big")
+
+class FingerprintIndex:
+    """ Remembers the perceptual hash of every poster an overlay was found in, along with which overlay was found and
+        where, so a near duplicate of a known overlaid poster, like the same Kometa render uploaded to another Item or
+        re-encoded by Plex, is confirmed by matching that one overlay at that one spot instead of every template.
+
+        Clean posters are never classified by the index. An overlay changes too few bits of a perceptual hash to tell
+        a poster from its overlaid copy, so only a found overlay, checked again in the new poster, is trusted. Entries
+        are kept in the cache and are dropped whenever the templates change. """
+
+    def __init__(self, bank, cache, threshold=0.95, max_distance=16, margin=8, candidates=3):
+        self.bank = bank
+        self.cache = cache
+        self.threshold = threshold
+        self.max_distance = max_distance
+        self.margin = margin
+        self.candidates = candidates
+        self.hits = 0
+        self.entries = {}
+        self._templates = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return sum(len(e) for e in self.entries.values())
+
+    def _load(self):
+        # Called with the lock held whenever the template fingerprint has changed since the entries were loaded
+        fingerprint = self.bank.fingerprint
+        if fingerprint != self._templates:
+            self.entries = {}
+            for image_hash, size, template, x, y in self.cache.query_fingerprints(fingerprint):
+                self.entries.setdefault(size, []).append((int(image_hash, 16), template, x, y))
+            self._templates = fingerprint
+        return fingerprint
+
+    def find(self, gray):
+        """ Returns the overlay Template and its score when the poster is a near duplicate of a known overlaid poster
+            and that overlay is still found where it was, otherwise `None, None`. """
+        image_hash = dhash(gray)
+        size = f"{gray.shape[1]}x{gray.shape[0]}"
+        with self._lock:
+            self._load()
+            entries = self.entries.get(size, [])
+            nearest = sorted((d, template, x, y) for h, template, x, y in entries if (d := (h ^ image_hash).bit_count()) <= self.max_distance)
+        for _, path, x, y in nearest[:self.candidates]:
+            template = self.bank.templates.get(path)
+            if template is None:
+                continue
+            height, width = template.shape[:2]
+            top, left = max(y - self.margin, 0), max(x - self.margin, 0)
+            roi = gray[top:y + height + self.margin, left:x + width + self.margin]
+            if roi.shape[0] < height or roi.shape[1] < width:
+                continue
+            score = float(cv2.matchTemplate(roi, template.image, cv2.TM_CCOEFF_NORMED).max())
+            if score >= self.threshold:
+                self.hits += 1
+                self.bank.hit(template)
+                return template, score
+        return None, None
+
+    def add(self, gray, template, location):
+        """ Saves the poster an overlay was just found in along with the top left corner the Engine found it at. """
+        template = self.bank.templates.get(str(template))
+        if template is None or location is None:
+            return
+        x, y = int(location[0]), int(location[1])
+        image_hash = dhash(gray)
+        size = f"{gray.shape[1]}x{gray.shape[0]}"
+        with self._lock:
+            fingerprint = self._load()
+            self.entries.setdefault(size, []).append((image_hash, template.path, x, y))
+        self.cache.update_fingerprint(fingerprint, f"{image_hash:064x}", size, template.path, x, y)
@@ -0,0 +1,72 @@
+import io
+
+import cv2, numpy, requests
+from kometautils import Failed
+from PIL import Image, ImageFile
+
+ImageFile.LOAD_TRUNCATED_IMAGES = True
+image_types = ["image/png", "image/jpeg", "image/webp"]
+
+def png_exif(data):
+    """ Returns the eXIf chunk of a PNG or `None`. Pillow only reads the chunks before the pixels when opening a PNG, so
+        an eXIf chunk after them is found by walking the chunks instead of decoding the pixels to reach it. """
+    position = 8
+    while position + 8 <= len(data):
+        length = int.from_bytes(data[position:position + 4], "big")
+        chunk_type = data[position + 4:position + 8]
+        if chunk_type == b"eXIf":
+            return data[position + 8:position + 8 + length]
+        if chunk_type == b"IEND":
+            break
+        position += length + 12
+    return None
+
+class Poster:
+    """ Holds an encoded image in memory. The header and EXIF are read on creation and the pixels are only decoded
+        once, the first time the grayscale array is requested. """
+
+    def __init__(self, data, source):
+        self.data = data
+        self.source = source
+        self._gray = None
+        with Image.open(io.BytesIO(data)) as pil_image:
+            self.size = pil_image.size
+            self.exif = Image.Exif()
+            if "exif" in pil_image.info:
+                self.exif.load(pil_image.info["exif"])
+            elif pil_image.format == "PNG":
+                exif = png_exif(data)
+                if exif:
+                    self.exif.load(exif)
+
+    @property
+    def is_overlay(self):
+        return self.exif.get(0x04bc) == "overlay"
+
+    @property
+    def gray(self):
+        if self._gray is None:
+            self._gray = cv2.imdecode(numpy.frombuffer(self.data, dtype=numpy.uint8), cv2.IMREAD_GRAYSCALE)
+        return self._gray
+
+def same_image(first, second):
+    """ Returns whether two Posters show the same image, allowing for the small differences left by Plex re-encoding
+        an image. """
+    if first.data == second.data:
+        return True
+    if first.size != second.size or first.gray is None or second.gray is None:
+        return False
+    difference = cv2.absdiff(first.gray, second.gray)
+    return numpy.count_nonzero(difference > 24) <= difference.size // 1000
+
+def download_poster(url):
+    response = requests.get(url)
+    if response.status_code >= 400:
+        raise Failed("Image Error: Image Download Failed")
+    if response.headers.get("Content-Type") not in image_types:
+        raise Failed("Image Error: Image Not PNG, JPG, or WEBP")
+    return Poster(response.content, url)
+
+def open_poster(path):
+    with open(path, "rb") as handle:
+        return Poster(handle.read(), path)
@@ -0,0 +1,80 @@
+import json, os, threading
+
+class Journal:
+    """ Records the rating keys reset by a run so an interrupted run can pick up where it stopped.
+
+        Every line is written and flushed as soon as its Item is done, which is once its labels have been removed, so
+        the journal survives the script being killed and not only being canceled. `done` holds every Item, Season and Episode whose own poster is done and
+        `finished` holds the Items whose Seasons and Episodes are done as well. A journal is only resumed by a run with
+        the same options it was written with. """
+
+    def __init__(self, path, options):
+        self.path = path
+        self.options = options
+        self.done = set()
+        self.finished = set()
+        self._handle = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.finished)
+
+    def load(self):
+        """ Reads an existing journal and returns whether there is anything to resume. """
+        self.done = set()
+        self.finished = set()
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, encoding="utf-8") as handle:
+            try:
+                if json.loads(handle.readline()) != self.options:
+                    return False
+            except ValueError:
+                return False
+            for line in handle:
+                # The last line can be cut short when the script was killed mid write
+                state, _, key = line.strip().partition(" ")
+                if not key.isdigit():
+                    continue
+                if state == "done":
+                    self.done.add(int(key))
+                elif state == "finished":
+                    self.finished.add(int(key))
+        return bool(self.done or self.finished)
+
+    def start(self, resume=False):
+        """ Opens the journal, starting a new one unless the loaded journal is being resumed. """
+        if resume:
+            self._handle = open(self.path, "a", encoding="utf-8")
+        else:
+            self.done = set()
+            self.finished = set()
+            self._handle = open(self.path, "w", encoding="utf-8")
+            self._handle.write(f"{json.dumps(self.options)}\n")
+            self._handle.flush()
+
+    def _write(self, state, key, keys):
+        with self._lock:
+            keys.add(key)
+            if self._handle:
+                self._handle.write(f"{state} {key}\n")
+                self._handle.flush()
+
+    def add(self, key):
+        self._write("done", key, self.done)
+
+    def finish(self, key):
+        self._write("finished", key, self.finished)
+
+    def close(self):
+        with self._lock:
+            if self._handle:
+                os.fsync(self._handle.fileno())
+                self._handle.close()
+                self._handle = None
+
+    def remove(self):
+        """ Deletes the journal once the run writing it has completed. """
+        if self._handle:
+            self.close()
+            os.remove(self.path)
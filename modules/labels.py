@@ -0,0 +1,126 @@
+import threading
+from contextlib import nullcontext
+
+import requests
+from plexapi.exceptions import BadRequest, NotFound
+
+class LabelQueue:
+    """ Collects the labels to remove from Items and removes each label from up to `batch_size` Items of the same type
+        with a single multi-edit, removing them one Item at a time only when a batch fails.
+
+        Labels are only removed once a batch is full or the queue is flushed, so the queue should be flushed before the
+        run ends. Anything that should only happen once an Item's labels are gone, like marking it done in the resume
+        journal, is passed to `when_removed`. Labels are not removed while the Event passed to `hold_until` is unset. """
+
+    def __init__(self, section, logger, batch_size=100, dry=False, metrics=None):
+        self.section = section
+        self.logger = logger
+        self.metrics = metrics
+        self.batch_size = batch_size
+        self.dry = dry
+        self.removed = 0
+        self.failed = 0
+        self.requests = 0
+        self._pending = {}
+        self._waiting = {}
+        self._callbacks = {}
+        self._failed = set()
+        self._ready = None
+        self._lock = threading.Lock()
+        self._edit_lock = threading.Lock()
+
+    @staticmethod
+    def _keys(plex_item):
+        # Seasons and Episodes also count towards their Show so the Show only counts as removed once they are
+        if plex_item.type == "season":
+            return [plex_item.ratingKey, plex_item.parentRatingKey]
+        if plex_item.type == "episode":
+            return [plex_item.ratingKey, plex_item.grandparentRatingKey]
+        return [plex_item.ratingKey]
+
+    def add(self, plex_item, labels):
+        full = []
+        with self._lock:
+            for key in self._keys(plex_item):
+                self._waiting[key] = self._waiting.get(key, 0) + len(labels)
+            for label in labels:
+                group = (plex_item.type, label)
+                self._pending.setdefault(group, []).append(plex_item)
+                if len(self._pending[group]) >= self.batch_size:
+                    full.append((label, self._pending.pop(group)))
+        for label, items in full:
+            self._remove(label, items)
+
+    def when_removed(self, rating_key, callback):
+        """ Calls `callback` once every label queued for the Item, and for a Show its Seasons and Episodes, has been
+            removed, straight away when none are queued. It is never called when one of them could not be removed. """
+        with self._lock:
+            if self._waiting.get(rating_key):
+                self._callbacks.setdefault(rating_key, []).append(callback)
+                return
+            if rating_key in self._failed:
+                return
+        callback()
+
+    def _finish(self, removed, failed):
+        callbacks = []
+        with self._lock:
+            for plex_item, success in [(i, True) for i in removed] + [(i, False) for i in failed]:
+                for key in self._keys(plex_item):
+                    if not success:
+                        self._failed.add(key)
+                    self._waiting[key] -= 1
+                    if self._waiting[key] <= 0:
+                        del self._waiting[key]
+                        waiting = self._callbacks.pop(key, [])
+                        if key not in self._failed:
+                            callbacks.extend(waiting)
+        for callback in callbacks:
+            callback()
+
+    def hold_until(self, event):
+        """ Holds every label removal until `event` is set, like while the Items are still being listed by label. """
+        self._ready = event
+
+    def flush(self):
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+        for (_, label), items in pending.items():
+            self._remove(label, items)
+
+    def _remove(self, label, items):
+        removed, failed = self._edit(label, items)
+        self._finish(removed, failed)
+
+    def _edit(self, label, items):
+        """ Removes the label and returns the Items it was removed from and the Items it could not be removed from. """
+        if self._ready:
+            self._ready.wait()
+        timer = self.metrics.time("Label Removal") if self.metrics else nullcontext()
+        # The section holds the batch being edited so only one batch can be built at a time
+        with self._edit_lock, timer:
+            if self.dry:
+                self.removed += len(items)
+                return items, []
+            try:
+                self.requests += 1
+                self.section.batchMultiEdits(items).removeLabel(label).saveMultiEdits()
+                self.removed += len(items)
+                self.logger.debug(f"Label Removed: {label} from {len(items)} Items")
+                return items, []
+            except (BadRequest, NotFound, requests.exceptions.RequestException) as e:
+                self.logger.debug(f"Label Batch Failed: {label} from {len(items)} Items, Removing One at a Time: {e}")
+            removed = []
+            failed = []
+            for plex_item in items:
+                try:
+                    self.requests += 1
+                    plex_item.removeLabel(label)
+                    self.removed += 1
+                    removed.append(plex_item)
+                except (BadRequest, NotFound, requests.exceptions.RequestException) as e:
+                    self.failed += 1
+                    failed.append(plex_item)
+                    self.logger.error(f"Plex Error: Label {label} could not be Removed from {plex_item.title}: {e}")
+            return removed, failed
@@ -0,0 +1,218 @@
+import threading
+from datetime import datetime
+
+from plexapi.exceptions import BadRequest, NotFound
+
+class LibraryItems:
+    """ Finds the items of a library section that carry any of the labels being removed and streams them back in
+        library order, loading them from Plex a batch at a time.
+
+        Only the rating keys of matching items are listed and the items themselves are fetched by rating key as they
+        are needed. When seasons or episodes are being reset, Shows are also returned when only their Seasons or
+        Episodes carry a label.
+
+        When `since` is given only the items Plex has updated since that timestamp are listed, along with the Shows
+        whose Seasons or Episodes were updated since then, and when `shard` is given only the items in that Shard are
+        kept. When `start` is given the items sorted before the Item with that rating key are kept in `skipped`.
+
+        Plex sorts titles in its own order, so whenever Shows are found through their Seasons or Episodes or `start`
+        is given, the rating keys of the whole library are listed once more to put the items in library order. Otherwise
+        the items are already listed in library order, so they are listed on a thread while the first ones are
+        returned. Listing by label pages through the results by offset, which would skip items if their labels were
+        removed while it runs, so labels should not be removed until `listed` is set. """
+
+    def __init__(self, section, labels, titles=None, child_types=None, everything=False, since=None, shard=None, start=None, page_size=100):
+        self.section = section
+        self.labels = labels
+        self.titles = titles
+        self.child_types = child_types if child_types else []
+        self.everything = everything
+        self.since = since
+        self.shard = shard
+        self.start = start
+        self.page_size = page_size
+        self.keys = []
+        self.labeled = set()
+        self.parents = set()
+        self.unlabeled = set()
+        self.unfiltered = []
+        self.skipped = set()
+        self.excluded = set()
+        self.listed = threading.Event()
+        self._listing = threading.Condition()
+        self._error = None
+
+    def __len__(self):
+        return len(self.keys)
+
+    def total(self):
+        """ Returns the number of items as text, ending in `+` while more are still being listed. """
+        return f"{len(self.keys)}{'' if self.listed.is_set() else '+'}"
+
+    def _filters(self, libtype):
+        filters = {}
+        if not self.everything:
+            filters["label"] = self.labels
+        if self.titles and libtype == self.section.TYPE:
+            filters["title"] = self.titles
+        if self.since:
+            # >> is Plex's "is after" date operator, a plain >= would compare the date as a string
+            filters["updatedAt>>"] = datetime.fromtimestamp(self.since)
+        return filters
+
+    def _search(self, libtype, filters):
+        size = self.page_size * 10
+        start = 0
+        while True:
+            page = self.section.search(libtype=libtype, filters=filters, includeGuids=False, container_start=start, container_size=size, maxresults=size)
+            yield from page
+            if len(page) < size:
+                break
+            start += size
+
+    def load(self, keys=None):
+        """ Lists the matching rating keys, or uses the given rating keys without listing the library at all. """
+        if keys is not None:
+            self.keys = list(keys)
+            self.everything = True
+        elif self._load():
+            return self
+        if self.shard:
+            self.keys = [k for k in self.keys if self.shard.contains(k)]
+        self.listed.set()
+        return self
+
+    def _load(self):
+        """ Lists the matching rating keys and returns whether the Movies or Shows are still being listed on a thread. """
+        if not self.everything or self.since:
+            found = set()
+            for libtype in self.child_types:
+                try:
+                    children = list(self._search(libtype, self._filters(libtype)))
+                except (BadRequest, NotFound):
+                    self.unfiltered.append(libtype)
+                    continue
+                for child in children:
+                    show_key = child.parentRatingKey if libtype == "season" else child.grandparentRatingKey
+                    show_title = child.parentTitle if libtype == "season" else child.grandparentTitle
+                    if self.titles and show_title not in self.titles:
+                        continue
+                    self.labeled.add(child.ratingKey)
+                    self.parents.add(show_key)
+                    if libtype == "episode":
+                        self.parents.add(child.parentRatingKey)
+                    found.add(show_key)
+            if self.unfiltered:
+                self.everything = True
+            if found and not self.unfiltered:
+                self.keys = [i.ratingKey for i in self._search(self.section.TYPE, self._filters(self.section.TYPE))]
+                self.unlabeled = found - set(self.keys)
+                self.keys.extend(self.unlabeled)
+        if self.keys or self.since or self.start is not None:
+            if not self.keys:
+                self.keys = [i.ratingKey for i in self._search(self.section.TYPE, self._filters(self.section.TYPE))]
+            if self.start is not None or self.unlabeled:
+                # Every Item is already listed in library order when nothing filters the listing
+                self._sort(self.keys if self.everything and not self.since else self._order())
+            return False
+        threading.Thread(target=self._stream, daemon=True).start()
+        return True
+
+    def _stream(self):
+        try:
+            for plex_item in self._search(self.section.TYPE, self._filters(self.section.TYPE)):
+                if self.shard and not self.shard.contains(plex_item.ratingKey):
+                    continue
+                with self._listing:
+                    if plex_item.ratingKey not in self.excluded:
+                        self.keys.append(plex_item.ratingKey)
+                        self._listing.notify_all()
+        except Exception as e:
+            self._error = e
+        finally:
+            with self._listing:
+                self.listed.set()
+                self._listing.notify_all()
+
+    def _order(self):
+        """ Lists the rating keys of every Movie or Show in library order. """
+        return [i.ratingKey for i in self._search(self.section.TYPE, {"title": self.titles} if self.titles else {})]
+
+    def _sort(self, order):
+        positions = {key: i for i, key in enumerate(order)}
+        self.keys.sort(key=lambda k: positions.get(k, len(order)))
+        if self.start is not None:
+            start = positions.get(self.start, len(order))
+            self.skipped = {k for k in self.keys if positions.get(k, len(order)) < start}
+
+    def exclude(self, keys):
+        """ Drops the given rating keys so those Items are never loaded. """
+        with self._listing:
+            self.excluded.update(keys)
+            self.keys = [k for k in self.keys if k not in self.excluded]
+
+    def _fetch(self, keys):
+        for i in range(0, len(keys), self.page_size):
+            batch = keys[i:i + self.page_size]
+            items = {item.ratingKey: item for item in self.section.fetchItems(batch)}
+            for key in batch:
+                if key in items:
+                    items[key]._autoReload = False
+                    yield items[key]
+
+    def _listed_keys(self):
+        """ Yields the rating keys a batch at a time, waiting for each batch while they are still being listed. """
+        done = 0
+        while True:
+            with self._listing:
+                self._listing.wait_for(lambda: len(self.keys) >= done + self.page_size or self.listed.is_set())
+                batch = self.keys[done:done + self.page_size]
+            if not batch:
+                break
+            done += len(batch)
+            yield from batch
+        if self._error:
+            raise self._error
+
+    def __iter__(self):
+        if self.listed.is_set():
+            yield from self._fetch(self.keys)
+        else:
+            keys = []
+            for key in self._listed_keys():
+                keys.append(key)
+                if len(keys) >= self.page_size:
+                    yield from self._fetch(keys)
+                    keys = []
+            yield from self._fetch(keys)
+
+    def seasons(self, show, episodes=False):
+        """ Returns the Show's Seasons paired with the Episodes to reset in each of them.
+
+            The Seasons and Episodes are listed once for the whole Show and then loaded in batches instead of being
+            listed and reloaded one Season and one Episode at a time. """
+        seasons = show.seasons()
+        children = {s.ratingKey: [] for s in seasons}
+        if episodes:
+            for episode in show.episodes():
+                if episode.parentRatingKey in children and self.selected(episode):
+                    children[episode.parentRatingKey].append(episode)
+        keys = [s.ratingKey for s in seasons] + [e.ratingKey for eps in children.values() for e in eps]
+        loaded = {item.ratingKey: item for item in self._fetch(keys)}
+        return [(loaded.get(s.ratingKey, s), [loaded.get(e.ratingKey, e) for e in children[s.ratingKey]]) for s in seasons]
+
+    @staticmethod
+    def loaded(plex_item):
+        return plex_item._autoReload is False
+
+    def selected(self, plex_item):
+        """ Returns whether the Item's own poster should be reset. """
+        if self.everything:
+            return True
+        if plex_item.TYPE in self.child_types:
+            return plex_item.ratingKey in self.labeled
+        return plex_item.ratingKey not in self.unlabeled
+
+    def contains(self, plex_item):
+        """ Returns whether any Season or Episode under the Item should be reset. """
+        return self.everything or plex_item.ratingKey in self.parents
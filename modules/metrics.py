@@ -0,0 +1,97 @@
+import json, os, threading, time
+from contextlib import nullcontext
+
+class _Timer:
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.metrics.add(self.stage, time.perf_counter() - self.start)
+
+class Metrics:
+    """ Times each stage of a run and counts what it downloaded and uploaded.
+
+        When disabled `time` returns a shared context manager that does nothing and `count` returns straight away, so
+        the instrumented code costs next to nothing. """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.timings = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._disabled = nullcontext()
+
+    def time(self, stage):
+        return _Timer(self, stage) if self.enabled else self._disabled
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self.timings.setdefault(stage, []).append(seconds)
+
+    def count(self, name, value=1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def stats(self):
+        stats = {}
+        with self._lock:
+            for stage, timings in self.timings.items():
+                timings = sorted(timings)
+                stats[stage] = {
+                    "count": len(timings),
+                    "total": sum(timings),
+                    "p50": timings[int((len(timings) - 1) * 0.5)],
+                    "p95": timings[int((len(timings) - 1) * 0.95)],
+                    "max": timings[-1]
+                }
+        return stats
+
+    def rows(self):
+        rows = []
+        for stage, stat in self.stats().items():
+            rows.append((stage, f"{stat['count']} | {stat['total']:.1f}s Total | p50 {stat['p50']:.3f}s | p95 {stat['p95']:.3f}s | Max {stat['max']:.3f}s"))
+        for name, value in sorted(self.counters.items()):
+            rows.append((name, f"{value / 1024 / 1024:.1f} MB" if name.endswith("Bytes") else str(value)))
+        return rows
+
+    def save_json(self, path):
+        self._write(path, json.dumps({"stages": self.stats(), "counters": self.counters}, indent=2))
+
+    def save_prometheus(self, path, labels=None):
+        """ Writes the metrics as a Prometheus textfile, adding `labels` to every sample so the files of several runs
+            can be collected side by side. """
+        extra = "".join(f',{k}="{v}"' for k, v in labels.items()) if labels else ""
+        lines = [
+            "# HELP overlay_reset_stage_seconds Time spent in each stage of the last Overlay Reset run.",
+            "# TYPE overlay_reset_stage_seconds summary"
+        ]
+        for stage, stat in self.stats().items():
+            label = _metric_name(stage)
+            lines.append(f'overlay_reset_stage_seconds{{stage="{label}",quantile="0.5"{extra}}} {stat["p50"]}')
+            lines.append(f'overlay_reset_stage_seconds{{stage="{label}",quantile="0.95"{extra}}} {stat["p95"]}')
+            lines.append(f'overlay_reset_stage_seconds{{stage="{label}",quantile="1"{extra}}} {stat["max"]}')
+            lines.append(f'overlay_reset_stage_seconds_sum{{stage="{label}"{extra}}} {stat["total"]}')
+            lines.append(f'overlay_reset_stage_seconds_count{{stage="{label}"{extra}}} {stat["count"]}')
+        for name, value in sorted(self.counters.items()):
+            metric = f"overlay_reset_{_metric_name(name)}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{{{extra[1:]}}} {value}" if extra else f"{metric} {value}")
+        self._write(path, "\n".join(lines) + "\n")
+
+    @staticmethod
+    def _write(path, text):
+        # Written to a temporary file first so collectors never read a half written file
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            handle.write(text)
+        os.replace(temp_path, path)
+
+def _metric_name(name):
+    return "".join(c if c.isalnum() else "_" for c in name.lower())
@@ -0,0 +1,34 @@
+options = [
+    {"arg": "u",  "key": "url",           "env": "PLEX_URL",        "type": "str",  "default": None,  "help": "Plex URL of the Server you want to connect to."},
+    {"arg": "t",  "key": "token",         "env": "PLEX_TOKEN",      "type": "str",  "default": None,  "help": "Plex Token of the Server you want to connect to."},
+    {"arg": "l",  "key": "library",       "env": "PLEX_LIBRARY",    "type": "str",  "default": None,  "help": "Plex Library Name you want to reset."},
+    {"arg": "a",  "key": "asset",         "env": "KOMETA_ASSET",    "type": "str",  "default": None,  "help": "Kometa Asset Folder to Scan for restoring posters."},
+    {"arg": "o",  "key": "original",      "env": "KOMETA_ORIGINAL", "type": "str",  "default": None,  "help": "Kometa Original Folder to Scan for restoring posters."},
+    {"arg": "ta", "key": "tmdbapi",       "env": "TMDBAPI",         "type": "str",  "default": None,  "help": "TMDb V3 API Key for restoring posters from TMDb."},
+    {"arg": "tc", "key": "tmdb-cache",    "env": "TMDB_CACHE",      "type": "int",  "default": 60,    "help": "Days before cached TMDb results are looked up again. (Default: 60)"},
+    {"arg": "tn", "key": "tmdb-miss",     "env": "TMDB_MISS",       "type": "int",  "default": 1,     "help": "Days before TMDb results that were Not Found are looked up again. (Default: 1)"},
+    {"arg": "st", "key": "start",         "env": "START",           "type": "str",  "default": None,  "help": "Plex Item Title to Start restoring posters from."},
+    {"arg": "it", "key": "items",         "env": "ITEMS",           "type": "str",  "default": None,  "help": "Restore specific Plex Items by Title. Can use a bar-separated (|) list."},
+    {"arg": "lb", "key": "labels",        "env": "LABELS",          "type": "str",  "default": None,  "help": "Additional labels to remove. Can use a bar-separated (|) list."},
+    {"arg": "di", "key": "discord",       "env": "DISCORD",         "type": "str",  "default": None,  "help": "Webhook URL to channel for Notifications."},
+    {"arg": "en", "key": "engine",        "env": "ENGINE",          "type": "str",  "default": None,  "help": "Overlay Detection Engine to use. Options: match, fft, pyramid (Default: match)"},
+    {"arg": "w",  "key": "workers",       "env": "WORKERS",         "type": "int",  "default": 1,     "help": "Number of Items to Reset at the same time. (Default: 1)"},
+    {"arg": "sh", "key": "shard",         "env": "SHARD",           "type": "str",  "default": None,  "help": "Only Reset one Shard of the Library so several runs can Reset it at once. Use K/N, i.e. 1/4"},
+    {"arg": "ti", "key": "timeout",       "env": "TIMEOUT",         "type": "int",  "default": 600,   "help": "Timeout can be any number greater then 0. (Default: 600)"},
+    {"arg": "d",  "key": "dry",           "env": "DRY_RUN",         "type": "bool", "default": False, "help": "Run as a Dry Run without making changes in Plex."},
+    {"arg": "pl", "key": "plan",          "env": "PLAN",            "type": "str",  "default": None,  "help": "Save the posters that would be reset to this Plan File instead of resetting them."},
+    {"arg": "ap", "key": "apply",         "env": "APPLY",           "type": "str",  "default": None,  "help": "Reset the posters saved in this Plan File without searching for them again."},
+    {"arg": "f",  "key": "flat",          "env": "KOMETA_FLAT",     "type": "bool", "default": False, "help": "Kometa Asset Folder uses Flat Assets Image Paths."},
+    {"arg": "nm", "key": "no-main",       "env": "NO_MAIN",         "type": "bool", "default": False, "help": "Do not restore the Main Movie/Show posters during run."},
+    {"arg": "s",  "key": "season",        "env": "SEASON",          "type": "bool", "default": False, "help": "Restore Season posters during run."},
+    {"arg": "e",  "key": "episode",       "env": "EPISODE",         "type": "bool", "default": False, "help": "Restore Episode posters during run."},
+    {"arg": "ai", "key": "all-items",     "env": "ALL_ITEMS",       "type": "bool", "default": False, "help": "Reset every Item in the Library instead of only Items with a Label to be Removed."},
+    {"arg": "ir", "key": "ignore-resume", "env": "IGNORE_RESUME",   "type": "bool", "default": None,  "help": "Ignores the automatic resume."},
+    {"arg": "wa", "key": "watch",         "env": "WATCH",           "type": "int",  "default": 0,     "help": "Keep running and Reset the Items changed since the last pass every this many seconds. (Default: 0, Run Once)"},
+    {"arg": "wh", "key": "webhook",       "env": "WEBHOOK",         "type": "int",  "default": 0,     "help": "Port to listen on for Webhooks that start the next watch pass straight away."},
+    {"arg": "wb", "key": "webhook-bind",  "env": "WEBHOOK_BIND",    "type": "str",  "default": "127.0.0.1", "help": "Address the Webhook Port listens on, 0.0.0.0 listens on every address. (Default: 127.0.0.1)"},
+    {"arg": "mt", "key": "metrics",       "env": "METRICS",         "type": "str",  "default": None,  "help": "Time each stage of the run and add it to the summary. Options: summary, json, prometheus"},
+    {"arg": "nc", "key": "no-cache",      "env": "NO_CACHE",        "type": "bool", "default": False, "help": "Run without using or updating the Overlay Detection Cache."},
+    {"arg": "tr", "key": "trace",         "env": "TRACE",           "type": "bool", "default": False, "help": "Run with extra trace logs."},
+    {"arg": "lr", "key": "log-requests",  "env": "LOG_REQUESTS",    "type": "bool", "default": False, "help": "Run with every request logged."}
+]
@@ -0,0 +1,52 @@
+import json, threading
+from datetime import datetime
+
+from kometautils import Failed
+
+class Plan:
+    """ The posters a planning run chose for each Item and the labels to remove from it, saved so another run can apply
+        them without searching for or checking any poster again.
+
+        Each entry holds the Item's rating key, the source of its poster, the file path or URL to upload, or `None` when
+        Plex already shows it, the labels to remove, and the rating key the Item is sharded by. """
+
+    def __init__(self, library, labels, entries=None, created=None):
+        self.library = library
+        self.labels = labels
+        self.entries = entries if entries else []
+        self.created = created
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def keys(self, shard=None):
+        """ Returns the rating keys of the entries, only those in the Shard when one is given. """
+        # Plan Files saved before the shard key was added fall back on the Item's own rating key
+        return [e["ratingKey"] for e in self.entries if not shard or shard.contains(e.get("shardKey", e["ratingKey"]))]
+
+    @property
+    def uploads(self):
+        return sum(1 for e in self.entries if e["path"])
+
+    def add(self, rating_key, title, source, path, is_url, labels, shard_key=None):
+        with self._lock:
+            self.entries.append({"ratingKey": rating_key, "title": title, "source": source, "path": path, "url": is_url, "labels": labels,
+                                 "shardKey": shard_key if shard_key else rating_key})
+
+    def save(self, path):
+        self.created = datetime.now().isoformat(timespec="seconds")
+        data = {"library": self.library, "labels": self.labels, "created": self.created, "items": self.entries}
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(data, handle)
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, encoding="utf-8") as handle:
+                data = json.load(handle)
+            return cls(data["library"], data["labels"], entries=data["items"], created=data["created"])
+        except FileNotFoundError:
+            raise Failed(f"Plan Error: Plan File Not Found: {path}")
+        except (ValueError, KeyError, TypeError):
+            raise Failed(f"Plan Error: Plan File is Invalid: {path}")
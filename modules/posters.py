@@ -0,0 +1,53 @@
+import threading, weakref
+
+class PosterCandidates:
+    """ Walks an Item's Plex posters lazily and remembers which of them are clean so asking for the next clean poster
+        after a failed upload never downloads or checks an earlier poster again.
+
+        The title of the Item asking is passed to `check` with each poster, since a Show's posters are also checked
+        for its Seasons. """
+
+    def __init__(self, plex_item, check):
+        self._item = weakref.ref(plex_item)
+        self._check = check
+        self._posters = None
+        self._position = 0
+        self._lock = threading.Lock()
+        self.clean = []
+        self.selected = None
+
+    def get(self, item_title, index=0):
+        with self._lock:
+            plex_item = self._item()
+            if self._posters is None:
+                self._posters = plex_item.posters()
+            while len(self.clean) <= index and self._position < len(self._posters):
+                self._position += 1
+                plex_poster = self._posters[self._position - 1]
+                url = self._check(item_title, plex_item, self._position, plex_poster)
+                if url:
+                    self.clean.append(url)
+                    if plex_poster.selected:
+                        self.selected = url
+            return self.clean[index] if index < len(self.clean) else None
+
+_candidates = weakref.WeakKeyDictionary()
+_candidates_lock = threading.Lock()
+
+def poster_candidates(plex_item, check):
+    """ Returns the Item's PosterCandidates, shared by every caller for as long as the Item is in use. """
+    with _candidates_lock:
+        if plex_item not in _candidates:
+            _candidates[plex_item] = PosterCandidates(plex_item, check)
+        return _candidates[plex_item]
+
+def selected_candidate(plex_item):
+    """ Returns the URL of the Item's current poster when it has already been found to be clean. """
+    with _candidates_lock:
+        candidates = _candidates.get(plex_item)
+    return candidates.selected if candidates else None
+
+def forget_candidates(plex_item):
+    """ Drops the Item's PosterCandidates once its posters have changed. """
+    with _candidates_lock:
+        _candidates.pop(plex_item, None)
@@ -0,0 +1,29 @@
+from kometautils import Failed, YAML
+
+engines = ["match", "fft", "pyramid"]
+default_regions = {"portrait": {"*": [[0, 0, 1, 1]]}, "landscape": {"*": [[0, 0, 1, 1]]}}
+
+def load_regions(path):
+    regions = {}
+    for shape, placements in YAML(path=path).items():
+        if shape not in default_regions:
+            raise Failed(f"Regions Error: {shape} must be portrait or landscape")
+        if not isinstance(placements, dict):
+            raise Failed(f"Regions Error: {shape} must be a dictionary of overlay file patterns")
+        regions[shape] = {}
+        for pattern, boxes in placements.items():
+            if not isinstance(boxes, list) or not boxes:
+                raise Failed(f"Regions Error: {shape} {pattern} must be a list of regions")
+            regions[shape][str(pattern)] = []
+            for box in boxes:
+                try:
+                    box = [float(b) for b in box]
+                except (TypeError, ValueError):
+                    box = []
+                if len(box) != 4 or not 0 <= box[0] < box[2] <= 1 or not 0 <= box[1] < box[3] <= 1:
+                    raise Failed(f"Regions Error: {shape} {pattern} region {box} must be [left, top, right, bottom] between 0 and 1")
+                regions[shape][str(pattern)].append(box)
+    for shape, placements in default_regions.items():
+        if shape not in regions:
+            regions[shape] = placements
+    return regions
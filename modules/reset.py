@@ -0,0 +1,971 @@
+import hashlib, io, os, threading, time
+from datetime import datetime
+from functools import partial
+from xml.etree.ElementTree import ParseError
+
+import plexapi, requests
+from kometautils import util, Failed
+from plexapi.exceptions import BadRequest, NotFound, Unauthorized
+from plexapi.server import PlexServer
+from plexapi.video import Movie, Show, Season, Episode
+from modules.assets import AssetIndex
+from modules.cache import Cache
+from modules.journal import Journal
+from modules.labels import LabelQueue
+from modules.library import LibraryItems
+from modules.metrics import Metrics
+from modules.options import options
+from modules.plan import Plan
+from modules.posters import forget_candidates, poster_candidates, selected_candidate
+from modules.regions import engines, load_regions
+from modules.shard import Shard
+from modules.threads import GroupedLogger, OrderedPool
+from modules.watch import Watcher
+
+class OverlayReset:
+    """ Resets the overlaid posters of one Plex Library, the same way the script does, for use from other Python code.
+
+        `args` can be the script's KometaArgs or a dict of option keys, where missing options get their defaults, and
+        `logger` a KometaLogger. OpenCV, NumPy, PIL and tmdbapis are only imported once they are needed, so connecting
+        to Plex is not held up by them and runs that never check a poster never import them at all.
+
+            reset = OverlayReset({"url": url, "token": token, "library": "Movies", "dry": True}, logger)
+            reset.setup()
+            reset.run()
+            reset.close()
+            rows = reset.finish() """
+
+    def __init__(self, args, logger, base_dir=None):
+        self.args = {o["key"]: args[o["key"]] if o["key"] in args else o["default"] for o in options}
+        self.logger = logger
+        self.base_dir = base_dir if base_dir else os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.config_dir = os.path.join(self.base_dir, "config")
+        self.journal_file = os.path.join(self.config_dir, "resume.journal")
+        self.legacy_resume_file = os.path.join(self.config_dir, "resume.kor")
+        self.metrics = Metrics()
+        self.server = None
+        self.lib = None
+        self.tmdbapi = None
+        self.tmdb = None
+        self.labels = []
+        self.cache = None
+        self.fingerprint_index = None
+        self.overlay_directories = []
+        self.overlay_regions = None
+        self.overlay_bank = None
+        self.overlay_engine = None
+        self.threshold = 0.95
+        self.asset_index = None
+        self.detection_pool = None
+        self.journal = None
+        self.plan = None
+        self.label_queue = None
+        self.library_items = None
+        self.run_items = []
+        self.unfinished = set()
+        self.start_from = None
+        self.start_key = None
+        self.child_types = []
+        self.pass_start = None
+        self.items_found = 0
+        self.watch_items = 0
+        self.shard = None
+        self.watcher = None
+        self.run_type = ""
+        self.completed = False
+        self._detection_lock = threading.Lock()
+
+    def setup(self):
+        """ Validates the options and connects to Plex and TMDb. Raises Failed when the run can not start. """
+        # Connect to Plex
+        if not self.args["url"]:
+            raise Failed("Error: No Plex URL Provided")
+        if not self.args["token"]:
+            raise Failed("Error: No Plex Token Provided")
+        if not self.args["library"]:
+            raise Failed("Error: No Plex Library Name Provided")
+        try:
+            self.server = PlexServer(self.args["url"], self.args["token"], timeout=self.args["timeout"])
+            plexapi.server.TIMEOUT = self.args["timeout"]
+            os.environ["PLEXAPI_PLEXAPI_TIMEOUT"] = str(self.args["timeout"])
+            self.logger.info("Plex Connection Successful")
+        except Unauthorized:
+            raise Failed("Plex Error: Plex token is invalid")
+        except (requests.exceptions.ConnectionError, ParseError):
+            raise Failed("Plex Error: Plex url is invalid")
+        self.lib = next((s for s in self.server.library.sections() if s.title == self.args["library"]), None)
+        if not self.lib:
+            raise Failed(f"Plex Error: Library: {self.args['library']} not found. Options: {', '.join([s.title for s in self.server.library.sections()])}")
+        if self.lib.type not in ["movie", "show"]:
+            raise Failed("Plex Error: Plex Library must be Movie or Show")
+
+        # Connect to TMDb
+        self.tmdbapi = None
+        if self.args["tmdbapi"]:
+            from tmdbapis import TMDbAPIs, TMDbException
+            try:
+                self.tmdbapi = TMDbAPIs(self.args["tmdbapi"])
+                self.logger.info("TMDb Connection Successful")
+            except TMDbException as e:
+                self.logger.error(e)
+
+        # Check Labels
+        self.labels = ["Overlay"]
+        if self.args["labels"]:
+            self.labels.extend(self.args["labels"].split("|"))
+        self.logger.info(f"Labels to be Removed: {', '.join(self.labels)}")
+
+        # Check Plan File
+        if self.args["plan"] and self.args["apply"]:
+            raise Failed("Option Error: Plan and Apply can not be used together")
+        if self.args["plan"]:
+            self.args["plan"] = os.path.abspath(self.args["plan"])
+            self.args["dry"] = True
+            self.plan = Plan(self.lib.title, self.labels)
+            self.logger.info(f"Plan File will be Saved: {self.args['plan']}")
+        elif self.args["apply"]:
+            self.args["apply"] = os.path.abspath(self.args["apply"])
+            self.plan = Plan.load(self.args["apply"])
+            if self.plan.library != self.lib.title:
+                raise Failed(f"Plan Error: Plan File was made for Library: {self.plan.library}")
+            self.logger.info(f"Plan File Loaded: {self.args['apply']} ({len(self.plan)} Items Planned {self.plan.created})")
+
+        # Check Watch Mode
+        if self.args["watch"] < 0 or self.args["webhook"] < 0:
+            raise Failed("Option Error: Watch and Webhook must be 0 or greater")
+        if self.args["webhook"] and not self.args["watch"]:
+            raise Failed("Option Error: Webhook can only be used with Watch")
+        if not self.args["webhook-bind"]:
+            # An empty address would listen on every address
+            self.args["webhook-bind"] = "127.0.0.1"
+        if self.args["watch"]:
+            if self.args["plan"] or self.args["apply"] or self.args["items"] or self.args["start"]:
+                raise Failed("Option Error: Watch can not be used with Plan, Apply, Items or Start")
+            webhook = f" and on Webhooks to {self.args['webhook-bind']}:{self.args['webhook']}" if self.args["webhook"] else ""
+            self.logger.info(f"Watch Mode: Checking for Changes Every {self.args['watch']} Seconds{webhook}")
+
+        # Check for Overlay Files
+        overlay_directory = os.path.join(self.base_dir, "overlays")
+        config_overlay_directory = os.path.join(self.config_dir, "overlays")
+        if not os.path.exists(overlay_directory):
+            raise Failed(f"Folder Error: overlays Folder not found {os.path.abspath(overlay_directory)}")
+        if not os.path.exists(config_overlay_directory):
+            os.makedirs(config_overlay_directory)
+        self.overlay_directories = [overlay_directory, config_overlay_directory]
+        overlay_images = [p for o in self.overlay_directories for p in util.glob_filter(os.path.join(o, "*.png"))]
+        if not overlay_images:
+            raise Failed(f"Images Error: overlays Folder Images not found {os.path.abspath(os.path.join(overlay_directory, '*.png'))}")
+        self.logger.info(f"overlays Folder Images Found Successfully: {len(overlay_images)} Images")
+
+        # Check Detection Engine
+        self.args["engine"] = self.args["engine"].lower() if self.args["engine"] else "match"
+        if self.args["engine"] not in engines:
+            raise Failed(f"Option Error: Engine: {self.args['engine']} is invalid. Options: {', '.join(engines)}")
+        self.overlay_regions = None
+        regions_file = os.path.join(self.config_dir, "regions.yml")
+        if self.args["engine"] == "pyramid" and os.path.exists(regions_file):
+            self.overlay_regions = load_regions(regions_file)
+            self.logger.info(f"Overlay Regions Loaded: {regions_file}")
+        self.logger.info(f"Detection Engine: {self.args['engine']}")
+
+        # Check Metrics
+        if self.args["metrics"]:
+            self.args["metrics"] = self.args["metrics"].lower()
+            if self.args["metrics"] not in ["summary", "json", "prometheus"]:
+                raise Failed(f"Option Error: Metrics: {self.args['metrics']} is invalid. Options: summary, json, prometheus")
+            self.metrics.enabled = True
+            self.logger.info(f"Metrics Enabled: {self.args['metrics']}")
+
+        # Check Detection Cache
+        if self.args["no-cache"]:
+            self.logger.info("Overlay Detection Cache Disabled")
+        else:
+            self.cache = Cache(self.config_dir)
+            self.logger.info(f"Overlay Detection Cache Loaded: {self.cache.cache_path}")
+
+        # Check Workers
+        if self.args["workers"] < 1:
+            raise Failed("Option Error: Workers must be greater then 0")
+        if self.args["workers"] > 1:
+            if not self.args["apply"]:
+                from modules.detection import DetectionPool
+            if not self.args["apply"] and DetectionPool.available():
+                self.load_detection()
+                self.detection_pool = DetectionPool(self.overlay_bank, self.args["engine"], threshold=self.threshold, regions=self.overlay_regions, processes=min(self.args["workers"], os.cpu_count()))
+                self.overlay_engine = self.detection_pool
+                self.logger.info(f"Detection Processes: {self.detection_pool.processes}")
+            self.logger.info(f"Workers: {self.args['workers']}")
+            self.logger = GroupedLogger(self.logger)
+        self.label_queue = LabelQueue(self.lib, self.logger, dry=self.args["dry"], metrics=self.metrics)
+
+        # Check Shard
+        if self.args["shard"]:
+            self.shard = Shard.parse(self.args["shard"])
+            self.journal_file = os.path.join(self.config_dir, f"resume_{self.shard.name}.journal")
+            self.shard.start(self.config_dir, self.lib.title)
+            self.logger.info(f"Shard: {self.shard} of the Library")
+
+        if self.tmdbapi:
+            from modules.tmdb import TMDb
+            if self.args["tmdb-cache"] < 0 or self.args["tmdb-miss"] < 0:
+                raise Failed("Option Error: TMDb Cache Days must be 0 or greater")
+            self.tmdb = TMDb(self.tmdbapi, cache=self.cache, expiration=self.args["tmdb-cache"], miss_expiration=self.args["tmdb-miss"])
+
+        # Check for Assets Folder
+        assets_directory = os.path.join(self.base_dir, "assets")
+        if os.path.exists(assets_directory) and os.listdir(assets_directory) and not self.args["asset"]:
+            self.args["asset"] = assets_directory
+        if self.args["asset"]:
+            self.args["asset"] = os.path.abspath(self.args["asset"])
+            if not os.path.exists(self.args["asset"]):
+                raise Failed(f"Folder Error: Asset Folder Path Not Found: {self.args['asset']}")
+            self.logger.info(f"Asset Folder Loaded: {self.args['asset']}")
+            self.asset_index = AssetIndex(self.args["asset"], cache=self.cache)
+            if not self.args["apply"]:
+                with self.metrics.time("Asset Scan"):
+                    self.asset_index.scan()
+                self.metrics.count("Asset Folders Listed", self.asset_index.listed)
+                self.metrics.count("Asset Folders Reused", self.asset_index.reused)
+                self.logger.info(f"Asset Folder Indexed: {len(self.asset_index)} Folders ({self.asset_index.listed} Listed, {self.asset_index.reused} Unchanged)")
+        else:
+            self.logger.warning("No Asset Folder Found")
+
+        # Check for Originals Folder
+        originals_directory = os.path.join(self.base_dir, "originals")
+        if os.path.exists(originals_directory) and os.listdir(originals_directory) and not self.args["original"]:
+            self.args["original"] = originals_directory
+        if self.args["original"]:
+            self.args["original"] = os.path.abspath(self.args["original"])
+            if not os.path.exists(self.args["original"]):
+                raise Failed(f"Folder Error: Original Folder Path Not Found: {os.path.abspath(self.args['original'])}")
+            self.logger.info(f"Originals Folder Loaded: {self.args['original']}")
+        else:
+            self.logger.warning("No Originals Folder Found")
+
+    def load_detection(self):
+        """ Loads the overlay templates, the detection engine and the fingerprint index the first time they are needed. """
+        with self._detection_lock:
+            if self.overlay_bank is None:
+                from modules.detection import get_engine
+                from modules.fingerprints import FingerprintIndex
+                from modules.templates import TemplateBank
+                overlay_bank = TemplateBank(self.overlay_directories, self.logger)
+                self.overlay_engine = get_engine(self.args["engine"], overlay_bank, threshold=self.threshold, regions=self.overlay_regions)
+                if self.cache:
+                    self.fingerprint_index = FingerprintIndex(overlay_bank, self.cache, threshold=self.threshold)
+                self.overlay_bank = overlay_bank
+                self.logger.debug(f"overlays Folder Images Loaded: {len(overlay_bank)} Templates")
+        return self.overlay_bank
+
+    def refresh_templates(self):
+        """ Reloads the overlay templates changed since they were loaded, once per run or Watch Pass. """
+        if self.overlay_bank is not None and self.overlay_bank.refresh():
+            self.logger.info(f"overlays Folder Images Reloaded: {len(self.overlay_bank)} Templates")
+
+    def verdict_fingerprint(self):
+        """ Returns what cached verdicts are only valid for: the overlay templates, the engine and its threshold. """
+        return f"{self.overlay_bank.fingerprint}|{self.args['engine']}|{self.overlay_engine.threshold}"
+
+    def check_poster(self, item_title, poster_source, shape, poster, out_path):
+        try:
+            if poster.is_overlay:
+                self.logger.debug(f"Overlay Detected: EXIF Overlay Tag Found ignoring {poster_source}: {out_path}")
+                return True, None
+            if (shape == "portrait" and poster.size != (1000, 1500)) or (shape == "landscape" and poster.size != (1920, 1080)):
+                self.logger.debug("No Overlay: Image not standard overlay size")
+                return False, None
+
+            target = poster.gray
+            if target is None:
+                self.logger.error(f"Image Load Error: {poster_source}: {out_path}", group=item_title)
+                return None, None
+            if target.shape[0] < 500 or target.shape[1] < 500:
+                self.logger.info(f"Image Error: {poster_source}: Dimensions {target.shape[0]}x{target.shape[1]} must be greater then 500x500: {out_path}")
+                return False, None
+            if self.fingerprint_index is not None:
+                template, score = self.fingerprint_index.find(target)
+                if template:
+                    self.logger.debug(f"Overlay Detected: {template} found in {poster_source}: {out_path} with score {score} like a Known Overlaid Poster")
+                    return True, score
+            template, score, location = self.overlay_engine.detect(target)
+            if template:
+                self.logger.debug(f"Overlay Detected: {template} found in {poster_source}: {out_path} with score {score}")
+                if self.fingerprint_index is not None:
+                    self.fingerprint_index.add(target, template, location)
+                return True, score
+            return False, score
+        except Exception:
+            self.logger.stacktrace()
+            self.logger.error(f"Image Load Error: {poster_source}: {out_path}", group=item_title)
+            return None, None
+
+    def detect_overlay_in_image(self, item_title, poster_source, shape, img_path=None, url_path=None, cache_key=None):
+        from modules.images import download_poster, open_poster
+        out_path = url_path if url_path else img_path
+        self.load_detection()
+        if self.cache and cache_key:
+            found, verdict, score = self.cache.query_verdict(f"{shape}|{cache_key}", self.verdict_fingerprint())
+            if found:
+                self.logger.debug(f"Cached Verdict: {'Overlay' if verdict else 'No Overlay' if verdict is False else 'Error'} for {poster_source}: {out_path}")
+                return verdict
+        try:
+            if url_path:
+                with self.metrics.time("Poster Download"):
+                    poster = download_poster(url_path)
+                self.metrics.count("Downloaded Bytes", len(poster.data))
+            else:
+                poster = open_poster(img_path)
+        except Failed as e:
+            self.logger.error(f"{e}: {poster_source}: {out_path}", group=item_title)
+            return None
+        except Exception:
+            self.logger.stacktrace()
+            self.logger.error(f"Image Load Error: {poster_source}: {out_path}", group=item_title)
+            return None
+        if self.cache and not cache_key:
+            cache_key = hashlib.sha1(poster.data).hexdigest()
+            found, verdict, score = self.cache.query_verdict(f"{shape}|{cache_key}", self.verdict_fingerprint())
+            if found:
+                self.logger.debug(f"Cached Verdict: {'Overlay' if verdict else 'No Overlay' if verdict is False else 'Error'} for {poster_source}: {out_path}")
+                return verdict
+        with self.metrics.time("Overlay Detection"):
+            verdict, score = self.check_poster(item_title, poster_source, shape, poster, out_path)
+        # Errors are not cached so a poster that could not be loaded or checked is checked again next time
+        if self.cache and verdict is not None:
+            self.cache.update_verdict(f"{shape}|{cache_key}", self.verdict_fingerprint(), verdict, score)
+        return verdict
+
+    def reset_from_plex(self, item_title, item_with_posters, shape, ignore=0):
+        def check(check_title, plex_item, p, plex_poster):
+            self.logger.trace(f"Poster URL: {plex_poster.key}")
+            if not plex_poster.key.startswith("/"):
+                return plex_poster.key
+            temp_url = f"{self.args['url']}{plex_poster.key}&X-Plex-Token={self.args['token']}"
+            user = plex_poster.ratingKey.startswith("upload")
+            updated = int(plex_item.updatedAt.timestamp()) if plex_item.updatedAt else ""
+            cache_key = f"{plex_item.ratingKey}|{plex_poster.ratingKey}|{updated}"
+            if not user or (user and self.detect_overlay_in_image(check_title, f"Plex Poster {p}", shape, url_path=temp_url, cache_key=cache_key) is False):
+                return temp_url
+
+        return poster_candidates(item_with_posters, check).get(item_title, ignore)
+
+    def item_labels(self, plex_item, remove):
+        current = [la.tag for la in plex_item.labels]
+        return [la for la in remove if la in current]
+
+    def remove_labels(self, plex_item, remove):
+        remove = self.item_labels(plex_item, remove)
+        if remove:
+            self.label_queue.add(plex_item, remove)
+            self.logger.debug(f"Labels Queued for Removal: {', '.join(remove)}")
+        else:
+            self.logger.debug("No Labels to Remove")
+
+    def upload_poster(self, plex_item, poster_path, is_url, data=None):
+        """ Uploads the poster from its URL or file, or from `data` when the image was already downloaded. """
+        with self.metrics.time("Poster Upload"):
+            if data is not None:
+                plex_item.uploadPoster(filepath=io.BytesIO(data))
+            elif is_url:
+                plex_item.uploadPoster(url=poster_path)
+            else:
+                plex_item.uploadPoster(filepath=poster_path)
+        self.metrics.count("Uploads by URL" if is_url and data is None else "Uploads by File")
+        if data is not None:
+            self.metrics.count("Uploaded Bytes", len(data))
+        elif self.metrics.enabled and not is_url:
+            self.metrics.count("Uploaded Bytes", os.path.getsize(poster_path))
+
+    def reset_poster(self, item_title, plex_item, tmdb_poster_url, asset_directory, asset_file_name, parent=None, shape="portrait"):
+        """ Resets the Item's poster and returns whether it was reset. """
+        poster_source = None
+        poster_path = None
+
+        # Check Assets
+        if asset_directory:
+            with self.metrics.time("Asset Lookup"):
+                asset_match = self.asset_index.find_file(asset_directory, asset_file_name)
+            if asset_match:
+                poster_source = "Assets Folder"
+                poster_path = asset_match
+            else:
+                self.logger.info("No Asset Found")
+
+        # Check Original Folder
+        if not poster_source and self.args["original"]:
+            png = os.path.join(self.args["original"], f"{plex_item.ratingKey}.png")
+            jpg = os.path.join(self.args["original"], f"{plex_item.ratingKey}.jpg")
+            if os.path.exists(png) and self.detect_overlay_in_image(item_title, "Original Poster", shape, img_path=png) is False:
+                poster_source = "Originals Folder"
+                poster_path = png
+            elif os.path.exists(jpg) and self.detect_overlay_in_image(item_title, "Original Poster", shape, img_path=jpg) is False:
+                poster_source = "Originals Folder"
+                poster_path = jpg
+            else:
+                self.logger.info("No Original Found")
+
+        # Check Plex
+        if not poster_source:
+            poster_path = self.reset_from_plex(item_title, plex_item, shape)
+            if poster_path:
+                poster_source = "Plex"
+            else:
+                self.logger.info("No Clean Plex Image Found")
+
+        # TMDb
+        if not poster_source:
+            if tmdb_poster_url:
+                poster_source = "TMDb"
+                poster_path = tmdb_poster_url
+            else:
+                self.logger.info("No TMDb Image Found")
+
+        # Check Item's Show
+        if not poster_source and parent:
+            poster_path = self.reset_from_plex(item_title, parent, shape)
+            if poster_path:
+                poster_source = "Plex's Show"
+            else:
+                self.logger.info("No Clean Plex Show Image Found")
+
+        chosen_data = None
+
+        def source_key():
+            # Files are told apart by their size and modified time so a changed file does not count as uploaded
+            if poster_source == "TMDb":
+                return poster_path
+            stat = os.stat(poster_path)
+            return f"{poster_path}|{stat.st_size}|{int(stat.st_mtime)}"
+
+        def upload(attempt=0):
+            nonlocal poster_path
+            is_url = poster_source in ["TMDb", "Plex", "Plex's Show"]
+            try:
+                if self.args["dry"]:
+                    self.logger.info(f"Poster will be Reset by {'URL' if is_url else 'File'} from {poster_source}")
+                else:
+                    self.logger.info(f"Reset From {poster_source}")
+                    self.logger.info(f"{'URL' if is_url else 'File'} Path: {poster_path}")
+                    self.upload_poster(plex_item, poster_path, is_url, data=chosen_data)
+                    forget_candidates(plex_item)
+                    if self.cache and poster_source in ["Assets Folder", "Originals Folder", "TMDb"]:
+                        self.cache.update_upload(plex_item.ratingKey, source_key())
+            except BadRequest as eb:
+                self.logger.error(eb, group=item_title)
+                if poster_source in ["Plex", "Plex's Show"]:
+                    attempt += 1
+                    self.logger.info(f"Trying next poster #{attempt + 1}")
+                    if poster_source == "Plex":
+                        poster_path = self.reset_from_plex(item_title, plex_item, shape, ignore=attempt)
+                        if not poster_path:
+                            self.logger.info("No Clean Plex Image Found")
+                    if poster_source == "Plex's Show":
+                        poster_path = self.reset_from_plex(item_title, parent, shape, ignore=attempt)
+                        if not poster_path:
+                            self.logger.info("No Clean Plex Show Image Found")
+                    if poster_path:
+                        return upload(attempt=attempt)
+                return False
+            else:
+                self.remove_labels(plex_item, self.labels)
+                return True
+
+        def already_set():
+            nonlocal chosen_data
+            if poster_source == "Plex":
+                return poster_path == selected_candidate(plex_item)
+            # Labeled Items almost always show their overlaid poster, so the current poster is only downloaded and
+            # compared when this same poster was uploaded to the Item before
+            if poster_source == "Plex's Show" or not plex_item.thumb or not self.cache:
+                return False
+            try:
+                if self.cache.query_upload(plex_item.ratingKey) != source_key():
+                    return False
+                from modules.images import download_poster, open_poster, same_image
+                with self.metrics.time("Poster Download"):
+                    current = download_poster(f"{self.args['url']}{plex_item.thumb}?X-Plex-Token={self.args['token']}")
+                self.metrics.count("Downloaded Bytes", len(current.data))
+                if poster_source == "TMDb":
+                    with self.metrics.time("Poster Download"):
+                        chosen = download_poster(poster_path)
+                    self.metrics.count("Downloaded Bytes", len(chosen.data))
+                    # The TMDb image is uploaded from memory when it is not already set so it is only downloaded once
+                    chosen_data = chosen.data
+                else:
+                    chosen = open_poster(poster_path)
+                return same_image(current, chosen)
+            except Failed as ef:
+                self.logger.debug(f"{ef}: Could not Compare the Current Poster")
+            except Exception:
+                self.logger.stacktrace()
+            return False
+
+        # Upload poster and Remove "Overlay" Label
+        if poster_source and already_set():
+            self.logger.info(f"Poster from {poster_source} is Already Set, Skipping Upload")
+            self.remove_labels(plex_item, self.labels)
+            if self.args["plan"]:
+                self.plan.add(plex_item.ratingKey, item_title, poster_source, None, False, self.item_labels(plex_item, self.labels), Shard.key(plex_item))
+            return True
+        elif poster_source:
+            if not upload():
+                return False
+            if self.args["plan"]:
+                is_url = poster_source in ["TMDb", "Plex", "Plex's Show"]
+                # Plex poster URLs are saved without the server URL and token
+                if is_url and poster_path.startswith(self.args["url"]):
+                    poster_path = poster_path[len(self.args["url"]):].replace(f"&X-Plex-Token={self.args['token']}", "")
+                self.plan.add(plex_item.ratingKey, item_title, poster_source, poster_path, is_url, self.item_labels(plex_item, self.labels),
+                              Shard.key(plex_item))
+            return True
+        else:
+            self.logger.error("Image Error: No Image Found to Restore", group=item_title)
+            return False
+
+    def get_title(self, plex_item):
+        if isinstance(plex_item, Movie):
+            return f"Movie: {plex_item.title}"
+        elif isinstance(plex_item, Show):
+            return f"Show: {plex_item.title}"
+        elif isinstance(plex_item, Season):
+            if plex_item.title == f"Season {plex_item.seasonNumber}":
+                return plex_item.title
+            return f"Season {plex_item.seasonNumber}: {plex_item.title}"
+        elif isinstance(plex_item, Episode):
+            return f"Episode {plex_item.seasonEpisode.upper()}: {plex_item.title}"
+        else:
+            return f"Item: {plex_item.title}"
+
+    def reload(self, plex_item):
+        try:
+            with self.metrics.time("Item Reload"):
+                plex_item.reload(checkFiles=False, includeAllConcerts=False, includeBandwidths=False, includeChapters=False,
+                                 includeChildren=False, includeConcerts=False, includeExternalMedia=False, includeExtras=False,
+                                 includeFields=False, includeGeolocation=False, includeLoudnessRamps=False, includeMarkers=False,
+                                 includeOnDeck=False, includePopularLeaves=False, includeRelated=False, includeRelatedCount=0,
+                                 includeReviews=False, includeStations=False)
+            plex_item._autoReload = False
+        except (BadRequest, NotFound) as e1:
+            raise Failed(f"Plex Error: {self.get_title(plex_item)} Failed to Load: {e1}")
+
+    def run(self):
+        """ Resets the posters of the Library once, or applies the Plan File when one was given. """
+        self.completed = False
+        self.start_from = None
+        self.start_key = None
+        self.run_items = []
+        self.unfinished = set()
+        resume = False
+        journal_options = {"library": self.lib.title, "labels": self.labels, "season": bool(self.args["season"]), "episode": bool(self.args["episode"]),
+                           "no-main": bool(self.args["no-main"]), "all-items": bool(self.args["all-items"]), "dry": bool(self.args["dry"]),
+                           "plan": bool(self.args["plan"])}
+        if self.shard:
+            journal_options["shard"] = str(self.shard)
+        self.journal = Journal(self.journal_file, journal_options)
+        if self.args["apply"]:
+            self.logger.separator(f"Applying Plan File\n{self.args['apply']}")
+            self.run_type = "of a Plan File "
+        elif self.args["items"]:
+            self.run_items = [rs for r in self.args["items"].split("|") if (rs := r.strip())]
+            if len(self.run_items) > 1:
+                str_items = ""
+                current = ""
+                for r in self.run_items[:-1]:
+                    current += f"{r}, "
+                    if len(current) > 75:
+                        str_items += f"{current}\n"
+                        current = ""
+                str_items += f"and {self.run_items[-1]}"
+            else:
+                str_items = self.run_items[0]
+            self.logger.separator(f"Resetting Specific Posters\n{str_items}")
+            self.run_type = "of Specific Items "
+        elif self.args["start"]:
+            self.start_from = self.args["start"]
+            # Only labeled Items are listed so the run starts from where the start Item is in the library, whether or not it is listed
+            start_item = next((i for i in self.lib.search(title=self.start_from) if i.title == self.start_from), None)
+            if not start_item:
+                raise Failed(f'Option Error: Start: "{self.start_from}" not found in Library: {self.lib.title}')
+            self.start_key = start_item.ratingKey
+            self.logger.separator(f'Resetting Posters\nStarting From "{self.start_from}"')
+            self.run_type = f'Starting From "{self.start_from}" '
+        # A Plan File only holds the Items planned by the run saving it so a Plan run never resumes
+        elif not self.args["ignore-resume"] and not self.args["plan"] and (legacy_key := self.legacy_resume()):
+            self.start_key = legacy_key
+            self.logger.separator(f'Resetting Posters\nStarting From Rating Key "{legacy_key}"')
+            self.run_type = f'Starting From Rating Key "{legacy_key}" '
+        elif not self.args["ignore-resume"] and not self.args["plan"] and self.journal.load():
+            resume = True
+            self.logger.separator("Resetting Posters\nResuming the Last Run")
+            self.run_type = "Resumed "
+        if not self.run_items and not self.start_from and not self.args["apply"]:
+            if not resume and not self.start_key:
+                self.logger.separator("Resetting All Posters")
+            self.journal.start(resume=resume)
+
+        self.child_types = []
+        if self.lib.type == "show":
+            if self.args["season"]:
+                self.child_types.append("season")
+            if self.args["episode"]:
+                self.child_types.append("episode")
+        self.pass_start = int(time.time())
+        self.refresh_templates()
+        if self.args["apply"]:
+            # Plan entries are sharded by their Show so the Shows are kept whole
+            self.library_items = LibraryItems(self.lib, self.labels).load(keys=self.plan.keys(self.shard))
+        else:
+            with self.metrics.time("Library Listing"):
+                self.library_items = LibraryItems(self.lib, self.labels, titles=self.run_items, child_types=self.child_types, everything=self.args["all-items"], shard=self.shard,
+                                                  start=self.start_key).load()
+            for libtype in self.library_items.unfiltered:
+                self.logger.warning(f"Plex Warning: {libtype.capitalize()}s can not be filtered by Label, Checking Every Item")
+            self.label_queue.hold_until(self.library_items.listed)
+            in_shard = f" in Shard {self.shard}" if self.shard else ""
+            found = f"{len(self.library_items)} Items Found" if self.library_items.listed.is_set() else "Items are Reset as they are Listed"
+            if self.library_items.everything:
+                self.logger.info(f"{found}{in_shard}")
+            else:
+                self.logger.info(f"{found}{in_shard} with Labels: {', '.join(self.labels)}")
+        if self.journal.finished:
+            self.library_items.exclude(self.journal.finished)
+            resuming = f" with {len(self.library_items)} Items" if self.library_items.listed.is_set() else ""
+            self.logger.info(f"Resuming{resuming}, {len(self.journal)} Items were Already Reset")
+        self.items_found = len(self.library_items)
+
+        if self.args["apply"]:
+            OrderedPool(self.args["workers"], logger=self.logger).run(self.plan_tasks(self.library_items))
+        else:
+            OrderedPool(self.args["workers"], logger=self.logger).run(self.item_tasks(self.library_items), on_done=self.journal_finished)
+        self.label_queue.flush()
+        self.items_found = len(self.library_items)
+        if self.tmdb:
+            self.metrics.count("TMDb Cache Hits", self.tmdb.hits)
+            self.metrics.count("TMDb Cache Misses", self.tmdb.misses)
+
+        if self.args["plan"]:
+            self.plan.save(self.args["plan"])
+            self.logger.separator(f"Plan File Saved: {len(self.plan)} Items, {self.plan.uploads} Uploads\n{self.args['plan']}")
+        self.journal.remove()
+        self.completed = True
+
+    def legacy_resume(self):
+        """ Returns the rating key saved by a run from before the resume journal, which is only resumed from once, or
+            `None` when there is none. """
+        if not os.path.exists(self.legacy_resume_file):
+            return None
+        with open(self.legacy_resume_file, encoding="utf-8") as handle:
+            rating_key = next((line.strip() for line in handle if line.strip()), "")
+        os.remove(self.legacy_resume_file)
+        if not rating_key.isdigit():
+            self.logger.warning(f"Resume Warning: {self.legacy_resume_file} has no Rating Key and was Removed")
+            return None
+        return int(rating_key)
+
+    def watch(self):
+        """ Resets the Items changed since the last pass every `watch` seconds until interrupted. """
+        self.completed = False
+        self.start_key = None
+        self.watcher = Watcher(self.args["watch"], self.lib.title, port=self.args["webhook"], bind=self.args["webhook-bind"], logger=self.logger)
+        self.logger.separator(f"Watching for Changes Every {self.args['watch']} Seconds")
+        self.watch_items = 0
+        try:
+            while True:
+                woken = self.watcher.wait()
+                next_start = int(time.time())
+                try:
+                    # Items are listed from a minute before the last pass started so clock drift between here and Plex
+                    # does not lose changes made while the last pass was running
+                    with self.metrics.time("Library Listing"):
+                        self.library_items = LibraryItems(self.lib, self.labels, child_types=self.child_types, everything=self.args["all-items"],
+                                                          since=self.pass_start - 60, shard=self.shard).load()
+                    if self.library_items:
+                        self.logger.separator(f"Watch Pass {self.watcher.passes}{' Started by Webhook' if woken else ''}\n{len(self.library_items)} Changed Items Found")
+                        self.journal = Journal(self.journal_file, self.journal.options)
+                        self.refresh_templates()
+                        if self.asset_index:
+                            with self.metrics.time("Asset Scan"):
+                                self.asset_index.scan()
+                        OrderedPool(self.args["workers"], logger=self.logger).run(self.item_tasks(self.library_items))
+                        self.label_queue.flush()
+                        self.watch_items += len(self.library_items)
+                        if self.cache:
+                            self.cache.evict()
+                    else:
+                        self.logger.debug(f"Watch Pass {self.watcher.passes}: No Changed Items Found")
+                except (BadRequest, NotFound, requests.exceptions.RequestException) as e:
+                    # The next pass lists the changes since this pass was meant to list them
+                    self.logger.error(f"Plex Error: Watch Pass {self.watcher.passes} Failed: {e}")
+                    continue
+                self.pass_start = next_start
+        except KeyboardInterrupt:
+            self.logger.separator("Stopped Watching for Changes")
+        self.watcher.stop()
+        self.completed = True
+
+    def reset_item(self, i, total_items, item):
+        title = item.title
+        self.logger.separator(f"Resetting {i + 1}/{total_items} {title}", start="reset")
+
+        # Find Item's Kometa Asset Directory
+        item_asset_directory = None
+        asset_name = None
+        if self.args["asset"]:
+            if not item.locations:
+                self.logger.error(f"Asset Error: No video filepath found fo {title}", group=title)
+            else:
+                file_name = "poster"
+                path_test = str(item.locations[0])
+                if not os.path.dirname(path_test):
+                    path_test = path_test.replace("\\", "/")
+                asset_name = util.validate_filename(os.path.basename(os.path.dirname(path_test) if isinstance(item, Movie) else path_test))
+                if self.args["flat"]:
+                    item_asset_directory = self.args["asset"]
+                    file_name = asset_name
+                else:
+                    with self.metrics.time("Asset Lookup"):
+                        item_asset_directory = self.asset_index.find_directory(asset_name)
+                if not item_asset_directory:
+                    self.logger.warning(f"Asset Warning: No Asset Directory Found")
+
+        tmdb_item = None
+        if self.tmdb:
+            from tmdbapis import TMDbException
+            guid = requests.utils.urlparse(item.guid) # noqa
+            item_type = guid.scheme.split(".")[-1]
+            check_id = guid.netloc
+            tmdb_id = None
+            tvdb_id = None
+            imdb_id = None
+            if item_type == "plex":
+                for guid_tag in item.guids:
+                    url_parsed = requests.utils.urlparse(guid_tag.id) # noqa
+                    if url_parsed.scheme == "tvdb":
+                        tvdb_id = int(url_parsed.netloc)
+                    elif url_parsed.scheme == "imdb":
+                        imdb_id = url_parsed.netloc
+                    elif url_parsed.scheme == "tmdb":
+                        tmdb_id = int(url_parsed.netloc)
+                if not tvdb_id and not imdb_id and not tmdb_id:
+                    item.refresh()
+            elif item_type == "imdb":
+                imdb_id = check_id
+            elif item_type == "thetvdb":
+                tvdb_id = int(check_id)
+            elif item_type == "themoviedb":
+                tmdb_id = int(check_id)
+            elif item_type in ["xbmcnfo", "xbmcnfotv"]:
+                if len(check_id) > 10:
+                    self.logger.warning(f"XMBC NFO Local ID: {check_id}")
+                try:
+                    if item_type == "xbmcnfo":
+                        tmdb_id = int(check_id)
+                    else:
+                        tvdb_id = int(check_id)
+                except ValueError:
+                    imdb_id = check_id
+            if not tvdb_id and not imdb_id and not tmdb_id:
+                self.logger.error("Plex Error: No External GUIDs found", group=title)
+            if not tmdb_id and imdb_id:
+                try:
+                    with self.metrics.time("TMDb Lookup"):
+                        tmdb_id = self.tmdb.find_id(imdb_id=imdb_id, is_movie=isinstance(item, Movie))
+                except TMDbException as e:
+                    self.logger.warning(e, group=title)
+            if not tmdb_id and tvdb_id and isinstance(item, Show):
+                try:
+                    with self.metrics.time("TMDb Lookup"):
+                        tmdb_id = self.tmdb.find_id(tvdb_id=tvdb_id, is_movie=False)
+                except TMDbException as e:
+                    self.logger.warning(e, group=title)
+            if tmdb_id:
+                try:
+                    with self.metrics.time("TMDb Lookup"):
+                        tmdb_item = self.tmdb.item(tmdb_id, is_movie=isinstance(item, Movie))
+                    if not tmdb_item:
+                        self.logger.error(f"TMDb Error: {'Movie' if isinstance(item, Movie) else 'Show'} {tmdb_id} Not Found", group=title)
+                except TMDbException as e:
+                    self.logger.error(f"TMDb Error: {e}", group=title)
+            else:
+                self.logger.error("Plex Error: TMDb ID Not Found", group=title)
+
+        if not self.library_items.selected(item):
+            self.logger.info("No Labels to Remove, Skipping Main Poster")
+            self.journal_done(item.ratingKey)
+        elif item.ratingKey in self.journal.done:
+            self.logger.info("Main Poster Already Reset")
+        elif self.args["no-main"]:
+            self.journal_done(item.ratingKey)
+        elif self.reset_poster(title, item, tmdb_item.poster_url if tmdb_item else None, item_asset_directory, asset_name if self.args["flat"] else "poster"):
+            self.journal_done(item.ratingKey)
+        else:
+            self.unfinished.add(item.ratingKey)
+
+        self.logger.info(f"Runtime: {self.logger.runtime('reset')}")
+
+        if isinstance(item, Show) and (self.args["season"] or self.args["episode"]) and self.library_items.contains(item):
+            with self.metrics.time("Season Listing"):
+                seasons = self.library_items.seasons(item, episodes=self.args["episode"])
+            return [partial(self.reset_season, item, season, episodes, tmdb_item, item_asset_directory, asset_name)
+                    for season, episodes in seasons
+                    if (self.args["season"] and self.library_items.selected(season)) or (self.args["episode"] and self.library_items.contains(season))]
+        return []
+
+    def reset_season(self, item, season, episodes, tmdb_item, item_asset_directory, asset_name):
+        tmdb_seasons = tmdb_item.seasons if tmdb_item else {}
+        title = f"Season {season.seasonNumber}"
+        title = title if title == season.title else f"{title}: {season.title}"
+        title = f"{item.title}\n {title}"
+        if self.args["season"] and self.library_items.selected(season) and season.ratingKey not in self.journal.done:
+            self.logger.separator(f"Resetting {title}", start="reset")
+            if not self.library_items.loaded(season):
+                try:
+                    self.reload(season)
+                except Failed as e:
+                    self.logger.error(e, group=title)
+                    self.unfinished.add(item.ratingKey)
+                    return []
+            tmdb_poster = tmdb_seasons.get(season.seasonNumber)
+            file_name = f"Season{'0' if not season.seasonNumber or season.seasonNumber < 10 else ''}{season.seasonNumber}"
+            if self.reset_poster(title, season, tmdb_poster, item_asset_directory, f"{asset_name}_{file_name}" if self.args["flat"] else file_name, parent=item):
+                self.journal_done(season.ratingKey)
+            else:
+                self.unfinished.add(item.ratingKey)
+
+            self.logger.info(f"Runtime: {self.logger.runtime('reset')}")
+
+        episodes = [e for e in episodes if e.ratingKey not in self.journal.done]
+        if not self.args["episode"] or not self.library_items.contains(season) or not episodes:
+            return []
+        tmdb_episodes = {}
+        if season.seasonNumber in tmdb_seasons:
+            from tmdbapis import TMDbException
+            try:
+                with self.metrics.time("TMDb Lookup"):
+                    tmdb_episodes = self.tmdb.episodes(tmdb_item.id, season.seasonNumber)
+            except TMDbException:
+                self.logger.error(f"TMDb Error: The Episodes of Season {season.seasonNumber} were Not Found", group=title)
+        return [partial(self.reset_episode, item, episode, tmdb_episodes, item_asset_directory, asset_name) for episode in episodes]
+
+    def reset_episode(self, item, episode, tmdb_episodes, item_asset_directory, asset_name):
+        title = f"{item.title}\nEpisode {episode.seasonEpisode.upper()}: {episode.title}"
+        self.logger.separator(f"Resetting {title}", start="reset")
+        if not self.library_items.loaded(episode):
+            try:
+                self.reload(episode)
+            except Failed as e:
+                self.logger.error(e, group=title)
+                self.unfinished.add(item.ratingKey)
+                return []
+        tmdb_poster = tmdb_episodes.get(episode.episodeNumber)
+        file_name = episode.seasonEpisode.upper()
+        if self.reset_poster(title, episode, tmdb_poster, item_asset_directory, f"{asset_name}_{file_name}" if self.args["flat"] else file_name, shape="landscape"):
+            self.journal_done(episode.ratingKey)
+        else:
+            self.unfinished.add(item.ratingKey)
+        self.logger.info(f"Runtime: {self.logger.runtime('reset')}")
+        return []
+
+    def journal_done(self, rating_key):
+        # An Item is only journaled once its poster is reset and its labels are removed so a killed run does not skip
+        # Items still labeled
+        self.label_queue.when_removed(rating_key, partial(self.journal.add, rating_key))
+
+    def journal_finished(self, rating_key):
+        # A Show with a Season or Episode that could not be reset is left for a resumed run to try again
+        if rating_key not in self.unfinished:
+            self.label_queue.when_removed(rating_key, partial(self.journal.finish, rating_key))
+
+    def skip_item(self, i, total_items, item):
+        self.logger.info(f"Skipping {i + 1}/{total_items} {item.title}")
+
+    def item_tasks(self, items):
+        started = False
+        for i, item in enumerate(items):
+            if (self.run_items and item.title not in self.run_items) or item.ratingKey in items.skipped:
+                yield None, partial(self.skip_item, i, items.total(), item)
+                continue
+            started = True
+            yield item.ratingKey, partial(self.reset_item, i, items.total(), item)
+        if (self.start_from or self.start_key) and not started:
+            start = f'"{self.start_from}"' if self.start_from else f'Rating Key "{self.start_key}"'
+            self.logger.warning(f"Start Warning: No Items to Reset were Found at or after {start}")
+
+    def apply_item(self, i, total_items, plex_item, entry):
+        title = entry["title"]
+        self.logger.separator(f"Applying {i + 1}/{total_items} {title}", start="reset")
+        if entry["path"]:
+            poster_path = entry["path"]
+            if entry["url"] and poster_path.startswith("/"):
+                poster_path = f"{self.args['url']}{poster_path}&X-Plex-Token={self.args['token']}"
+            try:
+                if self.args["dry"]:
+                    self.logger.info(f"Poster will be Reset by {'URL' if entry['url'] else 'File'} from {entry['source']}")
+                else:
+                    self.logger.info(f"Reset From {entry['source']}")
+                    self.logger.info(f"{'URL' if entry['url'] else 'File'} Path: {poster_path}")
+                    self.upload_poster(plex_item, poster_path, entry["url"])
+            except BadRequest as eb:
+                self.logger.error(eb, group=title)
+                return []
+        else:
+            self.logger.info(f"Poster from {entry['source']} is Already Set, Skipping Upload")
+        self.remove_labels(plex_item, entry["labels"])
+        self.logger.info(f"Runtime: {self.logger.runtime('reset')}")
+        return []
+
+    def plan_tasks(self, items):
+        entries = {e["ratingKey"]: e for e in self.plan.entries}
+        total_items = len(items)
+        for i, item in enumerate(items):
+            yield item.ratingKey, partial(self.apply_item, i, total_items, item, entries[item.ratingKey])
+
+    def close(self, evict=True):
+        """ Removes the labels still queued, saves the resume journal and stops the detection processes. """
+        if self.label_queue:
+            self.label_queue.flush()
+        if self.journal:
+            self.journal.close()
+        if self.detection_pool:
+            self.detection_pool.shutdown()
+        if self.cache and evict:
+            self.cache.evict()
+
+    def finish(self):
+        """ Saves the metrics files and, when the run completed, the Shard summary and returns the rows of the run's
+            summary report. """
+        report = []
+        if self.cache:
+            report.append([("Detection Cache", f"{self.cache.hits} Hits | {self.cache.misses} Misses")])
+        if self.fingerprint_index is not None:
+            report.append([("Known Overlays", f"{self.fingerprint_index.hits} Hits | {len(self.fingerprint_index)} Known")])
+        if self.label_queue:
+            report.append([(f"Labels {'to be ' if self.args['dry'] else ''}Removed", f"{self.label_queue.removed} Labels | {self.label_queue.requests} Requests")])
+        if self.metrics.enabled:
+            report.append(self.metrics.rows())
+            shard_suffix = f"_{self.shard.name}" if self.shard else ""
+            if self.args["metrics"] == "json":
+                self.metrics.save_json(os.path.join(self.config_dir, f"overlay_reset_metrics{shard_suffix}.json"))
+            elif self.args["metrics"] == "prometheus":
+                self.metrics.save_prometheus(os.path.join(self.config_dir, f"overlay_reset{shard_suffix}.prom"), labels={"shard": str(self.shard)} if self.shard else None)
+        if self.watcher:
+            report.append([("Watch Mode", f"{self.watcher.passes} Passes | {self.watch_items} Changed Items")])
+        if self.plan is not None:
+            report.append([("Plan File", f"{len(self.plan)} Items | {self.plan.uploads} Uploads")])
+        if self.shard and self.shard.started and not self.completed:
+            report.append([("Shard", f"{self.shard} | Run Failed, Shard Summary not Saved")])
+        elif self.shard and self.shard.started:
+            shard_summaries = self.shard.finish(self.config_dir, self.args["library"], {
+                "items": self.items_found + self.watch_items,
+                "labels_removed": self.label_queue.removed if self.label_queue else 0,
+                "errors": sum(len(e) for e in self.logger.errors.values()) + sum(len(c) for c in self.logger.criticals.values())
+            })
+            report.append([("Shard", f"{self.shard} | {len(shard_summaries)} of {self.shard.count} Shards Finished")])
+            if len(shard_summaries) == self.shard.count:
+                slowest = max(datetime.fromisoformat(s["finished"]) - datetime.fromisoformat(s["started"]) for s in shard_summaries)
+                report.append([
+                    ("All Shards Items", f"{sum(s['items'] for s in shard_summaries)} Items | {sum(s['labels_removed'] for s in shard_summaries)} Labels Removed"),
+                    ("All Shards Errors", str(sum(s["errors"] for s in shard_summaries))),
+                    ("Slowest Shard", str(slowest).split(".")[0])
+                ])
+        return report
@@ -0,0 +1,78 @@
+import hashlib, json, os, re
+from datetime import datetime
+
+from kometautils import Failed, util
+
+class Shard:
+    """ One of `count` disjoint slices of a library, so several runs on one or more hosts can reset the same library
+        at the same time without two of them ever uploading to the same Item.
+
+        Items are picked by a hash of their rating key so a shard always gets the same Items wherever it runs. Only
+        Movies and Shows are hashed, so Seasons and Episodes are always reset by the shard of their Show. """
+
+    def __init__(self, index, count):
+        self.index = index
+        self.count = count
+        self.started = None
+
+    def __str__(self):
+        return f"{self.index}/{self.count}"
+
+    @property
+    def name(self):
+        return f"{self.index}of{self.count}"
+
+    @classmethod
+    def parse(cls, text):
+        match = re.fullmatch(r"\s*(\d+)\s*/\s*(\d+)\s*", str(text))
+        if not match or not 1 <= int(match.group(1)) <= int(match.group(2)):
+            raise Failed(f"Option Error: Shard: {text} is invalid. Use K/N where K is from 1 to N, i.e. 1/4")
+        return cls(int(match.group(1)), int(match.group(2)))
+
+    @staticmethod
+    def key(plex_item):
+        """ Returns the rating key the Item is sharded by, which is its Show's for Seasons and Episodes. """
+        if plex_item.type == "season":
+            return plex_item.parentRatingKey
+        if plex_item.type == "episode":
+            return plex_item.grandparentRatingKey
+        return plex_item.ratingKey
+
+    def contains(self, rating_key):
+        return int(hashlib.sha1(str(rating_key).encode()).hexdigest(), 16) % self.count == self.index - 1
+
+    @staticmethod
+    def _directory(config_dir, library):
+        return os.path.join(config_dir, "shards", util.validate_filename(library))
+
+    def start(self, config_dir, library):
+        """ Removes this shard's summary from its last run so it is not counted until this run finishes. """
+        # Summaries are saved to the second so the start has to be too or a Shard finishing within a second is not counted
+        self.started = datetime.now().replace(microsecond=0)
+        path = os.path.join(self._directory(config_dir, library), f"{self.name}.json")
+        if os.path.exists(path):
+            os.remove(path)
+
+    def finish(self, config_dir, library, summary):
+        """ Saves this shard's summary and returns the summaries of every shard of this run that has finished.
+
+            A shard's summary only counts as part of this run when it was saved after this shard started, so shards
+            should be started together. """
+        directory = self._directory(config_dir, library)
+        os.makedirs(directory, exist_ok=True)
+        summary = {"shard": str(self), "started": self.started.isoformat(timespec="seconds"),
+                   "finished": datetime.now().isoformat(timespec="seconds"), **summary}
+        temp_path = os.path.join(directory, f"{self.name}.json.tmp")
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            json.dump(summary, handle)
+        os.replace(temp_path, os.path.join(directory, f"{self.name}.json"))
+        summaries = []
+        for index in range(1, self.count + 1):
+            try:
+                with open(os.path.join(directory, f"{index}of{self.count}.json"), encoding="utf-8") as handle:
+                    data = json.load(handle)
+                if datetime.fromisoformat(data["finished"]) >= self.started:
+                    summaries.append(data)
+            except (OSError, ValueError, KeyError, TypeError):
+                continue
+        return summaries
@@ -0,0 +1,103 @@
+import hashlib, os, threading
+
+import cv2
+from kometautils import util
+
+class Template:
+    def __init__(self, path, image, mtime):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.image = image
+        self.mtime = mtime
+        self.hits = 0
+
+    @property
+    def shape(self):
+        return self.image.shape
+
+    def __str__(self):
+        return self.path
+
+class TemplateBank:
+    """ Holds the overlay templates in memory. They are only loaded again when `refresh` finds they changed. """
+
+    def __init__(self, directories, logger):
+        self.directories = directories
+        self.logger = logger
+        self.templates = {}
+        self.version = 0
+        self._by_shape = {}
+        self._fingerprint = None
+        self._lock = threading.RLock()
+        self.refresh()
+
+    def __len__(self):
+        return len(self.templates)
+
+    def __bool__(self):
+        return len(self.templates) > 0
+
+    def refresh(self):
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self):
+        files = {}
+        for directory in self.directories:
+            for overlay_image in util.glob_filter(os.path.join(directory, "*.png")):
+                try:
+                    files[overlay_image] = os.stat(overlay_image).st_mtime
+                except OSError:
+                    continue
+
+        changed = False
+        for overlay_image in [p for p in self.templates if p not in files]:
+            self.logger.debug(f"Overlay Template Removed: {overlay_image}")
+            del self.templates[overlay_image]
+            changed = True
+        for overlay_image, mtime in files.items():
+            if overlay_image in self.templates and self.templates[overlay_image].mtime == mtime:
+                continue
+            overlay = cv2.imread(overlay_image, cv2.IMREAD_GRAYSCALE)
+            if overlay is None:
+                self.logger.error(f"Image Load Error: {overlay_image}")
+                self.templates.pop(overlay_image, None)
+            else:
+                hits = self.templates[overlay_image].hits if overlay_image in self.templates else 0
+                self.templates[overlay_image] = Template(overlay_image, overlay, mtime)
+                self.templates[overlay_image].hits = hits
+                self.logger.trace(f"Overlay Template Loaded: {overlay_image}")
+            changed = True
+        if changed:
+            self.version += 1
+            self._by_shape = {}
+            self._fingerprint = None
+        return changed
+
+    @property
+    def fingerprint(self):
+        if self._fingerprint is None:
+            sha = hashlib.sha1()
+            for template in sorted(self.templates.values(), key=lambda t: t.name):
+                sha.update(f"{template.name}:{template.shape}".encode())
+                sha.update(template.image.tobytes())
+            self._fingerprint = sha.hexdigest()
+        return self._fingerprint
+
+    def for_shape(self, shape):
+        with self._lock:
+            return self._for_shape(shape[:2])
+
+    def _for_shape(self, shape):
+        if shape not in self._by_shape:
+            fits = []
+            for template in self.templates.values():
+                if template.shape[0] > shape[0] or template.shape[1] > shape[1]:
+                    self.logger.error(f"Image Error: {template.path} is larger than {shape[1]}x{shape[0]} posters")
+                else:
+                    fits.append(template)
+            self._by_shape[shape] = fits
+        return sorted(self._by_shape[shape], key=lambda t: t.hits, reverse=True)
+
+    def hit(self, template):
+        template.hits += 1
@@ -0,0 +1,132 @@
+import inspect, threading, traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+class GroupedLogger:
+    """ Stands in for the KometaLogger while items run on worker threads. Every call a worker makes is held until the
+        main thread replays it so each item's lines are written together and in item order.
+
+        Only the public logging methods are wrapped. Calls made outside an item are written straight away one frame
+        further up the stack so they still point at the line that made them. """
+    buffered = ["trace", "debug", "info", "warning", "error", "critical", "separator"]
+
+    def __init__(self, logger):
+        self.logger = logger
+        self._local = threading.local()
+        self._lock = threading.RLock()
+        self._stacklevels = {attr: inspect.signature(getattr(logger, attr)).parameters["stacklevel"].default for attr in self.buffered}
+
+    def __getattr__(self, attr):
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        if attr not in self.buffered:
+            return getattr(self.logger, attr)
+
+        def call(*args, **kwargs):
+            return self._call(attr, args, kwargs)
+        return call
+
+    def _call(self, attr, args, kwargs):
+        calls = getattr(self._local, "calls", None)
+        if calls is None:
+            # Skips this wrapper and the call made through __getattr__
+            kwargs.setdefault("stacklevel", self._stacklevels[attr] + 2)
+            with self._lock:
+                return getattr(self.logger, attr)(*args, **kwargs)
+        if "start" in kwargs:
+            self._local.timers[kwargs.pop("start")] = datetime.now()
+        calls.append((attr, args, kwargs))
+
+    def stacktrace(self, trace=False):
+        self._call("trace" if trace else "debug", (traceback.format_exc(),), {})
+
+    def runtime(self, name=None):
+        timers = getattr(self._local, "timers", None)
+        if timers and name in timers:
+            return str(datetime.now() - timers[name]).split(".")[0]
+        return self.logger.runtime(name)
+
+    def hold(self):
+        """ Holds every call this thread makes until `release`. """
+        self._local.calls = []
+        self._local.timers = {}
+
+    def release(self):
+        """ Stops holding this thread's calls and returns the ones held so they can be replayed. """
+        calls = self._local.calls
+        self._local.calls = None
+        self._local.timers = None
+        return calls
+
+    def replay(self, calls):
+        with self._lock:
+            for attr, args, kwargs in calls:
+                getattr(self.logger, attr)(*args, **kwargs)
+
+class OrderedPool:
+    """ Runs tasks on a bounded thread pool while logging them in the order they were given.
+
+        Tasks are `(key, callable)` pairs and each callable can return more tasks which run, and are logged, right
+        after it. `on_done` is called with the key of each top level task once it and every task it returned are done. """
+
+    def __init__(self, workers, logger=None):
+        self.workers = max(workers, 1)
+        self.logger = logger
+
+    def run(self, tasks, on_done=None):
+        if self.workers == 1:
+            for key, task in tasks:
+                self._run_serial(task)
+                if key is not None and on_done:
+                    on_done(key)
+            return
+
+        tasks = iter(tasks)
+        pending = deque()
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+
+        def fill():
+            while len(pending) < self.workers * 2:
+                next_task = next(tasks, None)
+                if next_task is None:
+                    break
+                pending.append((next_task[0], executor.submit(self._grouped, next_task[1])))
+
+        current = None
+        try:
+            fill()
+            while pending:
+                key, future = pending.popleft()
+                # Children run before the next top level task so reaching it means the current one is done
+                if key is not None:
+                    if current is not None and on_done:
+                        on_done(current)
+                    current = key
+                calls, children, error = future.result()
+                self.logger.replay(calls)
+                if error:
+                    raise error
+                for child in reversed(children or []):
+                    pending.appendleft((None, executor.submit(self._grouped, child)))
+                fill()
+            if current is not None and on_done:
+                on_done(current)
+        except BaseException:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
+
+    def _run_serial(self, task):
+        for child in task() or []:
+            self._run_serial(child)
+
+    def _grouped(self, task):
+        self.logger.hold()
+        children = None
+        error = None
+        try:
+            children = task()
+        except BaseException as e:
+            error = e
+        return self.logger.release(), children, error
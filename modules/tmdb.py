@@ -0,0 +1,63 @@
+from tmdbapis import NotFound
+
+class TMDbItem:
+    def __init__(self, tmdb_id, is_movie, poster_url, seasons=None):
+        self.id = tmdb_id
+        self.is_movie = is_movie
+        self.poster_url = poster_url
+        self.seasons = seasons if seasons else {}
+
+class TMDb:
+    """ Looks up TMDb IDs and poster URLs through the Overlay Reset cache so reruns only go to TMDb once a result has
+        expired. Results TMDb could not find are remembered too, for the shorter `miss_expiration`. """
+
+    def __init__(self, api, cache=None, expiration=60, miss_expiration=1):
+        self.api = api
+        self.cache = cache
+        self.expiration = expiration
+        self.miss_expiration = miss_expiration
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key, load):
+        if self.cache:
+            found, data = self.cache.query_tmdb(key)
+            if found:
+                self.hits += 1
+                return data
+        self.misses += 1
+        data = load()
+        if self.cache:
+            self.cache.update_tmdb(key, data, self.expiration if data is not None else self.miss_expiration)
+        return data
+
+    def find_id(self, imdb_id=None, tvdb_id=None, is_movie=True):
+        def load():
+            results = self.api.find_by_id(imdb_id=imdb_id) if imdb_id else self.api.find_by_id(tvdb_id=tvdb_id)
+            if is_movie and results.movie_results:
+                return results.movie_results[0].id
+            elif not is_movie and results.tv_results:
+                return results.tv_results[0].id
+        return self._lookup(f"{'imdb' if imdb_id else 'tvdb'}|{imdb_id if imdb_id else tvdb_id}|{'movie' if is_movie else 'show'}", load)
+
+    def item(self, tmdb_id, is_movie=True):
+        def load():
+            try:
+                tmdb_item = self.api.movie(tmdb_id) if is_movie else self.api.tv_show(tmdb_id)
+            except NotFound:
+                return None
+            return {"poster": tmdb_item.poster_url, "seasons": {} if is_movie else {s.season_number: s.poster_url for s in tmdb_item.seasons}}
+        data = self._lookup(f"{'movie' if is_movie else 'show'}|{tmdb_id}", load)
+        if data is None:
+            return None
+        return TMDbItem(tmdb_id, is_movie, data["poster"], {int(k): v for k, v in data["seasons"].items()})
+
+    def episodes(self, tmdb_id, season_number):
+        def load():
+            try:
+                season = self.api.tv_season(tmdb_id, season_number)
+            except NotFound:
+                return None
+            return {e.episode_number: e.still_url for e in season.episodes}
+        data = self._lookup(f"season|{tmdb_id}|{season_number}", load)
+        return {int(k): v for k, v in data.items()} if data else {}
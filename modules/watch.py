@@ -0,0 +1,85 @@
+import json, threading
+from email.parser import BytesParser
+from email.policy import default
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from kometautils import Failed
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    watcher = None
+
+    def log_message(self, *args):
+        pass
+
+    def _payload(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0) or 0))
+        content_type = self.headers.get("Content-Type", "")
+        # Plex sends its webhooks as a multipart form with the JSON in the payload field
+        if content_type.startswith("multipart/"):
+            message = BytesParser(policy=default).parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+            for part in message.iter_parts():
+                if part.get_param("name", header="content-disposition") == "payload":
+                    body = part.get_payload(decode=True)
+                    break
+            else:
+                return {}
+        try:
+            payload = json.loads(body) if body else {}
+        except ValueError:
+            return None
+        return payload if isinstance(payload, dict) else None
+
+    def do_POST(self):
+        payload = self._payload()
+        if payload is None:
+            self.send_response(400)
+        else:
+            self.send_response(200)
+            self.watcher.notify(payload)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+class Watcher:
+    """ Waits between the passes of watch mode and wakes up early when the webhook is called.
+
+        The webhook only starts the next pass, which then finds the changed Items itself, so any POST can call it.
+        Plex's playback events and events from other libraries are ignored. """
+
+    def __init__(self, interval, library, port=None, bind="127.0.0.1", logger=None):
+        self.interval = interval
+        self.library = library
+        self.logger = logger
+        self.passes = 0
+        self._event = threading.Event()
+        self._server = None
+        if port:
+            handler = type("Handler", (_WebhookHandler,), {"watcher": self})
+            try:
+                self._server = ThreadingHTTPServer((bind, port), handler)
+            except OSError as e:
+                raise Failed(f"Watch Error: Webhook Port {port} could not be Opened on {bind}: {e}")
+            threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def notify(self, payload):
+        # Anything in the payload that is not what Plex sends is ignored and only wakes up the next pass
+        payload = payload if isinstance(payload, dict) else {}
+        event = payload.get("event") if isinstance(payload.get("event"), str) else ""
+        metadata = payload.get("Metadata") if isinstance(payload.get("Metadata"), dict) else {}
+        section = metadata.get("librarySectionTitle") if isinstance(metadata.get("librarySectionTitle"), str) else None
+        if event.startswith(("media.", "playback.")) or (section and section != self.library):
+            return
+        if self.logger:
+            self.logger.debug(f"Webhook Received: {event if event else 'Pass Requested'}")
+        self._event.set()
+
+    def wait(self):
+        """ Blocks until the next pass is due and returns whether the webhook started it. """
+        woken = self._event.wait(self.interval)
+        self._event.clear()
+        self.passes += 1
+        return woken
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
@@ -0,0 +1,382 @@
+import hashlib, json, random, re, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlparse
+from xml.sax.saxutils import quoteattr
+
+import cv2, numpy
+
+label_ids = {"Overlay": 101, "TCM": 102}
+type_ids = {"movie": 1, "show": 2, "season": 3, "episode": 4}
+sizes = {"portrait": (1000, 1500), "landscape": (1920, 1080)}
+
+def make_poster(size, overlay=None, seed=0):
+    """ Returns a PNG of blurred noise with the overlay's pixels pasted near the top left corner when one is given. """
+    rng = numpy.random.default_rng(seed)
+    image = cv2.GaussianBlur((rng.random((size[1], size[0])) * 255).astype(numpy.float32), (0, 0), 6)
+    image = cv2.cvtColor(cv2.normalize(image, None, 0, 255, cv2.NORM_MINMAX).astype(numpy.uint8), cv2.COLOR_GRAY2BGR)
+    if overlay is not None:
+        image[30:30 + overlay.shape[0], 30:30 + overlay.shape[1]] = overlay[..., :3]
+    return cv2.imencode(".png", image)[1].tobytes()
+
+class StandInLibrary:
+    """ A synthetic Plex Server with a Movies and a TV Shows library and the TMDb entries for their Items.
+
+        Every Item starts with an uploaded overlay poster selected and a few other uploaded, clean or overlaid, and
+        agent posters. `labeled` of the Items carry the Overlay label, a fifth of them only have an IMDb or TVDb ID so
+        they have to be looked up on TMDb and a tenth of those are not found. """
+
+    def __init__(self, overlay_path, movies=100, shows=10, seasons=2, episodes=5, labeled=0.8, seed=1):
+        rng = random.Random(seed)
+        overlay = cv2.imread(overlay_path, cv2.IMREAD_UNCHANGED)
+        self.lock = threading.Lock()
+        self.images = {}
+        self.posters = {}
+        for shape, size in sizes.items():
+            for kind in ["clean", "overlay"]:
+                for variant in range(2):
+                    data = make_poster(size, overlay=overlay if kind == "overlay" else None, seed=len(self.images))
+                    self.posters[(shape, kind, variant)] = self._add_image(data)
+        self.items = {}
+        self.sections = {1: {"title": "Movies", "type": "movie", "items": []}, 2: {"title": "TV Shows", "type": "show", "items": []}}
+        self.tmdb = {}
+        self.calls = {}
+        self.touched = set()
+        self.uploads = 0
+        self.label_edits = 0
+        now = int(time.time())
+        rating_key = 1000
+        for m in range(movies):
+            rating_key += 1
+            item = self._item(rng, rating_key, "movie", f"Movie {m:05d}", 1, labeled, now)
+            item["file"] = f"/media/movies/Movie {m:05d} (2000)/Movie {m:05d}.mkv"
+            item["guids"] = self._guids(rng, rating_key, "imdb", f"tt{rating_key:07d}", "movie")
+            self.sections[1]["items"].append(rating_key)
+        for s in range(shows):
+            rating_key += 1
+            show = self._item(rng, rating_key, "show", f"Show {s:04d}", 2, labeled, now)
+            show["file"] = f"/media/shows/Show {s:04d}"
+            show["guids"] = self._guids(rng, rating_key, "tvdb", str(rating_key), "tv", seasons=seasons, episodes=episodes)
+            show["children"] = []
+            self.sections[2]["items"].append(rating_key)
+            for n in range(1, seasons + 1):
+                rating_key += 1
+                season = self._item(rng, rating_key, "season", f"Season {n}", 2, labeled / 2, now)
+                season.update({"index": n, "parent": show["ratingKey"], "children": []})
+                show["children"].append(rating_key)
+                for e in range(1, episodes + 1):
+                    rating_key += 1
+                    episode = self._item(rng, rating_key, "episode", f"Episode {e}", 2, labeled / 2, now, shape="landscape")
+                    episode.update({"index": e, "parent": season["ratingKey"], "grandparent": show["ratingKey"]})
+                    season["children"].append(rating_key)
+
+    def _add_image(self, data):
+        key = hashlib.sha1(data).hexdigest()
+        self.images[key] = data
+        return key
+
+    def _item(self, rng, rating_key, item_type, title, section, labeled, now, shape="portrait"):
+        posters = [{"ratingKey": f"upload://posters/{self.posters[(shape, 'overlay', rng.randint(0, 1))]}", "selected": True}]
+        for _ in range(rng.randint(0, 3)):
+            posters.append({"ratingKey": f"upload://posters/{self.posters[(shape, rng.choice(['overlay', 'clean']), rng.randint(0, 1))]}", "selected": False})
+        if rng.random() < 0.2:
+            posters.append({"ratingKey": "metadata://posters/agent", "selected": False})
+        item = {"ratingKey": rating_key, "type": item_type, "title": title, "section": section, "updatedAt": now, "posters": posters,
+                "labels": ["Overlay"] if rng.random() < labeled else []}
+        self.items[rating_key] = item
+        return item
+
+    def _guids(self, rng, rating_key, source, external_id, tmdb_type, seasons=0, episodes=0):
+        guids = [f"{source}://{external_id}"]
+        if rng.random() < 0.8:
+            guids.append(f"tmdb://{rating_key}")
+        elif rng.random() < 0.1:
+            return guids
+        entry = {"id": rating_key, "external": (source, external_id), "poster_path": f"/{tmdb_type}{rating_key}.png"}
+        if tmdb_type == "tv":
+            entry["seasons"] = {n: [e for e in range(1, episodes + 1)] for n in range(1, seasons + 1)}
+        self.tmdb[(tmdb_type, rating_key)] = entry
+        return guids
+
+    def count(self, call, rating_keys=None):
+        with self.lock:
+            self.calls[call] = self.calls.get(call, 0) + 1
+            if rating_keys:
+                self.touched.update(rating_keys)
+
+    def stats(self):
+        with self.lock:
+            return {"calls": dict(sorted(self.calls.items())), "items": len(self.touched), "uploads": self.uploads, "label_edits": self.label_edits}
+
+    def reset_stats(self):
+        with self.lock:
+            self.calls = {}
+            self.touched = set()
+            self.uploads = 0
+            self.label_edits = 0
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    library = None
+    url = None
+    latency = 0
+    error_rate = 0
+    upload_error_rate = 0
+    rng = None
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, code, body=b"", content_type="text/xml;charset=utf-8"):
+        if isinstance(body, str):
+            body = body.encode()
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, data, code=200):
+        self._send(code, json.dumps(data), content_type="application/json;charset=utf-8")
+
+    def _xml(self, inner, **container):
+        attributes = " ".join(f"{k}={quoteattr(str(v))}" for k, v in container.items())
+        self._send(200, f'<?xml version="1.0" encoding="UTF-8"?>\n<MediaContainer {attributes}>{inner}</MediaContainer>')
+
+    def _fail(self, rate):
+        with self.library.lock:
+            return rate and self.rng.random() < rate
+
+    def _handle(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query, keep_blank_values=True)
+        path = url.path.rstrip("/") or "/"
+        parts = path.strip("/").split("/")
+        tmdb = parts[0] in ["3", "t"]
+        call = "/".join("<id>" if p.replace(",", "").isdigit() or p.startswith("tt") else p for p in parts[1 if tmdb else 0:])
+        if tmdb and parts[0] == "t":
+            call = "image"
+        # Every Item whose metadata or posters were asked for counts as an Item the run worked on
+        rating_keys = [int(k) for k in parts[2].split(",") if k] if parts[:2] == ["library", "metadata"] and len(parts) > 2 else None
+        self.library.count(f"{self.command} {'TMDb' if tmdb else 'Plex'} /{call}", rating_keys=rating_keys)
+        if self.latency:
+            time.sleep(self.latency)
+        if path != "/" and self._fail(self.error_rate):
+            return self._send(500, "Stand-In Error")
+        if parts[0] == "3":
+            return self._tmdb(parts[1:], query)
+        if parts[0] == "t":
+            shape = "landscape" if re.search(r"s\d+e\d+\.", parts[-1]) else "portrait"
+            return self._send(200, self.library.images[self.library.posters[(shape, "clean", 1)]], content_type="image/png")
+        return self._plex(path, parts, query)
+
+    do_GET = _handle
+    do_PUT = _handle
+    do_POST = _handle
+
+    def _tmdb(self, parts, query):
+        library = self.library
+        not_found = {"status_code": 34, "status_message": "The resource you requested could not be found."}
+        if parts == ["configuration"]:
+            return self._json({
+                "images": {"base_url": f"{self.url}/t/p/", "secure_base_url": f"{self.url}/t/p/", "backdrop_sizes": ["original"],
+                           "logo_sizes": ["original"], "poster_sizes": ["original"], "profile_sizes": ["original"], "still_sizes": ["original"]},
+                "change_keys": [], "countries": [{"iso_3166_1": "US", "english_name": "United States of America", "native_name": "United States"}],
+                "jobs": [], "languages": [{"iso_639_1": "en", "english_name": "English", "name": "English"}],
+                "primary_translations": ["en-US"], "timezones": []
+            })
+        if len(parts) == 2 and parts[0] == "find":
+            source = query.get("external_source", [""])[0].removesuffix("_id")
+            results = {"movie_results": [], "tv_results": [], "person_results": [], "tv_episode_results": [], "tv_season_results": []}
+            for (tmdb_type, _), entry in library.tmdb.items():
+                if entry["external"] == (source, parts[1]):
+                    results["movie_results" if tmdb_type == "movie" else "tv_results"].append(self._tmdb_entry(tmdb_type, entry))
+            return self._json(results)
+        if len(parts) >= 2 and parts[0] in ["movie", "tv"] and parts[1].isdigit():
+            entry = library.tmdb.get((parts[0], int(parts[1])))
+            if not entry:
+                return self._json(not_found, code=404)
+            if len(parts) == 2:
+                return self._json(self._tmdb_entry(parts[0], entry, full=True))
+            if len(parts) == 4 and parts[2] == "season" and int(parts[3]) in entry.get("seasons", {}):
+                number = int(parts[3])
+                return self._json({"id": entry["id"] * 100 + number, "season_number": number, "name": f"Season {number}",
+                                   "poster_path": f"/tv{entry['id']}s{number}.png",
+                                   "episodes": [{"id": entry["id"] * 10000 + number * 100 + e, "episode_number": e, "season_number": number,
+                                                 "name": f"Episode {e}", "still_path": f"/tv{entry['id']}s{number}e{e}.png"} for e in entry["seasons"][number]]})
+        return self._json(not_found, code=404)
+
+    @staticmethod
+    def _tmdb_entry(tmdb_type, entry, full=False):
+        data = {"id": entry["id"], "poster_path": entry["poster_path"], "media_type": tmdb_type, "genre_ids": []}
+        data["title" if tmdb_type == "movie" else "name"] = f"Stand-In {entry['id']}"
+        if full and tmdb_type == "tv":
+            data["seasons"] = [{"id": entry["id"] * 100 + n, "season_number": n, "name": f"Season {n}", "poster_path": f"/tv{entry['id']}s{n}.png"}
+                               for n in entry["seasons"]]
+        return data
+
+    def _metadata(self, item, full=False):
+        library = self.library
+        attributes = {"ratingKey": item["ratingKey"], "key": f"/library/metadata/{item['ratingKey']}", "type": item["type"], "title": item["title"],
+                      "librarySectionID": item["section"], "updatedAt": item["updatedAt"], "addedAt": item["updatedAt"],
+                      "thumb": f"/library/metadata/{item['ratingKey']}/thumb/{item['updatedAt']}"}
+        inner = "".join(f"<Label tag={quoteattr(label)} />" for label in item["labels"])
+        if full and "guids" in item:
+            inner += "".join(f'<Guid id="{guid}" />' for guid in item["guids"])
+        tag = "Video"
+        if item["type"] == "movie":
+            attributes["guid"] = f"plex://movie/{item['ratingKey']:024x}"
+            inner += f'<Media id="{item["ratingKey"]}"><Part id="{item["ratingKey"]}" file={quoteattr(item["file"])} /></Media>'
+        elif item["type"] == "show":
+            tag = "Directory"
+            attributes["guid"] = f"plex://show/{item['ratingKey']:024x}"
+            attributes["key"] += "/children"
+            inner += f"<Location path={quoteattr(item['file'])} />"
+        elif item["type"] == "season":
+            tag = "Directory"
+            show = library.items[item["parent"]]
+            attributes.update({"index": item["index"], "parentRatingKey": show["ratingKey"], "parentTitle": show["title"], "parentIndex": 1})
+            attributes["key"] += "/children"
+        elif item["type"] == "episode":
+            season = library.items[item["parent"]]
+            show = library.items[item["grandparent"]]
+            attributes.update({"index": item["index"], "parentIndex": season["index"], "parentRatingKey": season["ratingKey"],
+                               "parentTitle": season["title"], "grandparentRatingKey": show["ratingKey"], "grandparentTitle": show["title"]})
+        return f"<{tag} {' '.join(f'{k}={quoteattr(str(v))}' for k, v in attributes.items())}>{inner}</{tag}>"
+
+    def _search_meta(self, section_id, section):
+        types = ["movie"] if section["type"] == "movie" else ["show", "season", "episode"]
+        inner = "<Meta>"
+        for libtype in types:
+            prefix = "" if libtype == types[0] else f"{libtype}."
+            inner += (f'<Type key="/library/sections/{section_id}/all?type={type_ids[libtype]}" type="{libtype}" title="{libtype}" '
+                      f'active="{1 if libtype == types[0] else 0}"><Filter filter="label" filterType="string" '
+                      f'key="/library/sections/{section_id}/label?type={type_ids[libtype]}" title="Labels" type="filter" />'
+                      f'<Field key="{prefix}label" title="Label" type="tag" /><Field key="{prefix}title" title="Title" type="string" /></Type>')
+        inner += ('<FieldType type="tag"><Operator key="=" title="is" /><Operator key="!=" title="is not" /></FieldType>'
+                  '<FieldType type="string"><Operator key="=" title="contains" /><Operator key="==" title="is" /></FieldType>'
+                  '<FieldType type="date"><Operator key="&lt;&lt;=" title="is before" /><Operator key="&gt;&gt;=" title="is after" /></FieldType></Meta>')
+        return inner
+
+    def _plex(self, path, parts, query):
+        library = self.library
+        if path == "/":
+            return self._xml("", machineIdentifier="stand-in", version="1.40.0.0", friendlyName="Stand-In Plex", myPlex="0", platform="Linux")
+        if path == "/library":
+            return self._xml('<Directory key="sections" title="Library Sections" />', size=1, title1="Plex Library")
+        if path == "/library/sections":
+            inner = "".join(f'<Directory key="{k}" type="{v["type"]}" title="{v["title"]}" agent="tv.plex.agents.{v["type"]}" '
+                            f'scanner="Plex {v["type"].title()}" language="en-US" uuid="{k:08d}" />' for k, v in library.sections.items())
+            return self._xml(inner, size=len(library.sections))
+        if len(parts) == 4 and parts[:2] == ["library", "sections"] and int(parts[2]) in library.sections:
+            section_id = int(parts[2])
+            section = library.sections[section_id]
+            if parts[3] == "collections":
+                return self._xml("<Meta></Meta>" if "includeMeta" in query else "", size=0, totalSize=0)
+            if parts[3] == "label":
+                return self._xml("".join(f'<Directory key="{v}" title="{k}" />' for k, v in label_ids.items()), size=len(label_ids))
+            if parts[3] == "all" and "includeMeta" in query:
+                return self._xml(self._search_meta(section_id, section), size=0, totalSize=0)
+            if parts[3] == "all" and self.command == "PUT":
+                ids = [int(i) for i in query.get("id", [""])[0].split(",") if i]
+                removes = [unquote(t) for k, v in query.items() if k.startswith("label") and k.endswith("tag.tag-") for t in v[0].split(",")]
+                adds = [unquote(v[0]) for k, v in query.items() if k.startswith("label[") and k.endswith("tag.tag")]
+                with library.lock:
+                    library.label_edits += 1
+                    for i in ids:
+                        labels = [label for label in library.items[i]["labels"] if label not in removes]
+                        library.items[i]["labels"] = labels + [label for label in adds if label not in labels]
+                        library.items[i]["updatedAt"] = int(time.time())
+                return self._send(200)
+            if parts[3] == "all":
+                libtype = query.get("type", [None])[0]
+                keys = section["items"]
+                if libtype in ["3", "4"]:
+                    child_type = "season" if libtype == "3" else "episode"
+                    keys = [k for k, v in library.items.items() if v["section"] == section_id and v["type"] == child_type]
+                items = [library.items[k] for k in keys]
+                names = {str(v): k for k, v in label_ids.items()}
+                for key, values in query.items():
+                    field = key.split(".")[-1]
+                    if field == "label":
+                        labels = {names.get(label, label) for label in values[0].split(",")}
+                        items = [i for i in items if set(i["labels"]) & labels]
+                    elif field == "title=":
+                        items = [i for i in items if i["title"] in values[0].split(",")]
+                    elif field == "updatedAt>>":
+                        items = [i for i in items if i["updatedAt"] > int(values[0])]
+                    elif field == "title":
+                        items = [i for i in items if any(t.lower() in i["title"].lower() for t in values[0].split(","))]
+                start = int(query.get("X-Plex-Container-Start", [self.headers.get("X-Plex-Container-Start", 0)])[0])
+                size = int(query.get("X-Plex-Container-Size", [self.headers.get("X-Plex-Container-Size", len(items))])[0])
+                page = items[start:start + size]
+                return self._xml("".join(self._metadata(i) for i in page), size=len(page), totalSize=len(items), offset=start)
+        if len(parts) == 3 and parts[:2] == ["library", "metadata"] and "," in parts[2]:
+            found = [library.items[int(k)] for k in parts[2].split(",") if int(k) in library.items]
+            return self._xml("".join(self._metadata(i, full=True) for i in found), size=len(found))
+        if len(parts) >= 3 and parts[:2] == ["library", "metadata"] and parts[2].isdigit() and int(parts[2]) in library.items:
+            item = library.items[int(parts[2])]
+            shape = "landscape" if item["type"] == "episode" else "portrait"
+            if len(parts) == 3:
+                return self._xml(self._metadata(item, full=True), size=1)
+            if parts[3] == "children":
+                children = item.get("children", [])
+                return self._xml("".join(self._metadata(library.items[c]) for c in children), size=len(children))
+            if parts[3] == "allLeaves":
+                leaves = [e for s in item.get("children", []) for e in library.items[s]["children"]]
+                return self._xml("".join(self._metadata(library.items[e]) for e in leaves), size=len(leaves))
+            if parts[3] == "posters" and self.command == "POST":
+                if self._fail(self.upload_error_rate):
+                    return self._send(400, "Stand-In Upload Error")
+                length = int(self.headers.get("Content-Length", 0) or 0)
+                data = self.rfile.read(length) if length else None
+                if not data and "upload://posters/" in query.get("url", [""])[0]:
+                    data = library.images.get(query["url"][0].split("upload://posters/")[-1])
+                with library.lock:
+                    key = library._add_image(data) if data else library.posters[(shape, "clean", 0)]
+                    library.uploads += 1
+                    for poster in item["posters"]:
+                        poster["selected"] = False
+                    item["posters"].insert(0, {"ratingKey": f"upload://posters/{key}", "selected": True})
+                    item["updatedAt"] = int(time.time())
+                return self._send(200)
+            if parts[3] == "posters":
+                inner = ""
+                for poster in item["posters"]:
+                    file_key = f"/library/metadata/{item['ratingKey']}/file?url={quote(poster['ratingKey'], safe='')}"
+                    provider = "upload" if poster["ratingKey"].startswith("upload") else "local"
+                    inner += (f'<Photo key={quoteattr(file_key)} ratingKey="{poster["ratingKey"]}" '
+                              f'selected="{1 if poster["selected"] else 0}" provider="{provider}" />')
+                return self._xml(inner, size=len(item["posters"]))
+            if parts[3] in ["file", "thumb"]:
+                key = unquote(query.get("url", [""])[0])
+                if parts[3] == "thumb":
+                    key = next((p["ratingKey"] for p in item["posters"] if p["selected"]), "")
+                image_key = key.split("/")[-1]
+                data = library.images[image_key if image_key in library.images else library.posters[(shape, "clean", 0)]]
+                return self._send(200, data, content_type="image/png")
+        return self._send(404, "Not Found")
+
+class StandInServer:
+    """ Serves a StandInLibrary as both a Plex Server and the TMDb API, which is served under `/3`, on a local port. """
+
+    def __init__(self, library, port=0, latency=0, error_rate=0, upload_error_rate=0, seed=1):
+        handler = type("Handler", (StandInHandler,), {"library": library, "latency": latency, "error_rate": error_rate,
+                                                      "upload_error_rate": upload_error_rate, "rng": random.Random(seed)})
+        self.library = library
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        handler.url = self.url
+        self._thread = None
+
+    @property
+    def tmdb_url(self):
+        return f"{self.url}/3"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()